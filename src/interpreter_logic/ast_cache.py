@@ -0,0 +1,107 @@
+import hashlib
+import os
+import pickle
+
+from interpreter_logic import __version__ as interpreter_version
+from logging_config import log
+
+CACHE_FILE_EXTENSION = '.atc'
+DEFAULT_MAX_ENTRIES = 256
+
+
+def default_cache_directory():
+    cache_home = os.environ.get('XDG_CACHE_HOME', os.path.join(os.path.expanduser('~'), '.cache'))
+    return os.path.join(cache_home, 'atena')
+
+
+# Cache sparsowanych programów (AstProgram) zapisanych w plikach .atc.
+# Kluczem jest skrót treści programu i wersji interpretera, a liczba plików jest ograniczona -
+# przy przekroczeniu limitu usuwane są najdawniej używane wpisy (LRU według czasu modyfikacji)
+class AstCache:
+    def __init__(self, directory=None, max_entries=DEFAULT_MAX_ENTRIES):
+        if directory is None:
+            directory = default_cache_directory()
+        if max_entries < 1:
+            raise ValueError('AST cache must hold at least one entry')
+        self.directory = directory
+        self.max_entries = max_entries
+
+    @staticmethod
+    def key(source):
+        content = f'{interpreter_version}\0{source}'
+        return hashlib.sha256(content.encode('utf8')).hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.directory, key + CACHE_FILE_EXTENSION)
+
+    def load(self, source):
+        key = self.key(source)
+        path = self.path(key)
+        try:
+            with open(path, 'rb') as file:
+                data = pickle.load(file)
+        except FileNotFoundError:
+            return None
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError, ValueError) as e:
+            log.debug(f'Ignoring unreadable AST cache file {path} - {e}')
+            return None
+
+        if not isinstance(data, dict) or data.get('version') != interpreter_version or data.get('key') != key:
+            return None
+
+        # Odczyt odświeża pozycję wpisu w kolejce LRU
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return data['program']
+
+    def store(self, source, program):
+        key = self.key(source)
+        path = self.path(key)
+        temporary_path = f'{path}.{os.getpid()}.tmp'
+        data = {
+            'version': interpreter_version,
+            'key': key,
+            'program': program,
+        }
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(temporary_path, 'wb') as file:
+                pickle.dump(data, file, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temporary_path, path)
+        except (OSError, pickle.PicklingError, RecursionError) as e:
+            log.debug(f'Could not write AST cache file {path} - {e}')
+            try:
+                os.remove(temporary_path)
+            except OSError:
+                pass
+            return
+
+        self.evict()
+
+    def entries(self):
+        entries = []
+        try:
+            with os.scandir(self.directory) as directory_entries:
+                for entry in directory_entries:
+                    if entry.name.endswith(CACHE_FILE_EXTENSION):
+                        try:
+                            entries.append((entry.stat().st_mtime, entry.path))
+                        except OSError:
+                            pass
+        except OSError:
+            pass
+        return entries
+
+    def evict(self):
+        entries = self.entries()
+        if len(entries) <= self.max_entries:
+            return
+
+        entries.sort()
+        for _, path in entries[:len(entries) - self.max_entries]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
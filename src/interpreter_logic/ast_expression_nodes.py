@@ -129,3 +129,14 @@ class AstList:
         return f'{self.values}'
 
 
+class AstHoistedCall:
+    def __init__(self, call):
+        self.call = call
+
+    def accept(self, visitor):
+        return visitor.visit_hoisted_call(self)
+
+    def __str__(self):
+        return f'{self.call}'
+
+
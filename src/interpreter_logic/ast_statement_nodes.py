@@ -94,16 +94,17 @@ class AstFor:
 
 
 class AstFunctionDeclaration:
-    def __init__(self, name, params, body):
+    def __init__(self, name, params, body, memoized):
         self.name = name
         self.params = params
         self.body = body
+        self.memoized = memoized
 
     def accept(self, visitor):
         return visitor.visit_function_declaration(self)
 
     def __str__(self):
-        return f'{self.name} {self.params} {self.body}'
+        return f'{self.name} {self.params} {self.body} {self.memoized}'
 
 
 class AstReturn:
@@ -118,3 +119,18 @@ class AstReturn:
         return f'{self.keyword} {self.value}'
 
 
+class AstCountedLoop:
+    def __init__(self, name, operator, bound, body, fallback):
+        self.name = name
+        self.operator = operator
+        self.bound = bound
+        self.body = body
+        self.fallback = fallback
+
+    def accept(self, visitor):
+        return visitor.visit_counted_loop(self)
+
+    def __str__(self):
+        return f'{self.name} {self.operator} {self.bound} {self.body} {self.fallback}'
+
+
@@ -0,0 +1,195 @@
+import argparse
+import contextlib
+import glob
+import logging
+import multiprocessing
+import os
+import sys
+import time
+
+from interpreter_logic.ast_cache import AstCache, DEFAULT_MAX_ENTRIES
+from interpreter_logic.interpreter import Interpreter, ReturnException
+from interpreter_logic.main import BACKENDS, run_program
+from interpreter_logic.memo_cache import DEFAULT_MEMO_CACHE_SIZE
+from interpreter_logic.optimizer import DEFAULT_INLINE_THRESHOLD, OPTIMIZATION_LEVELS
+from interpreter_logic.output import MemoryOutput
+from interpreter_logic.parser import Parser
+from interpreter_logic.stack_evaluator import DEFAULT_MAX_STACK_SIZE
+from logging_config import log
+
+# Wykonanie wielu programów w puli procesów. Procesy robocze są uruchamiane raz - import
+# interpretera i tablice parsera (wczytane przy imporcie modułu parser, przed utworzeniem
+# procesów) nie są przygotowywane od nowa dla każdego programu - a każdy
+# program dostaje własny Interpreter. Wyniki są wypisywane w kolejności zakończenia programów
+STATUS_OK = 'ok'
+STATUS_SYNTAX_ERROR = 'syntax error'
+STATUS_ERROR = 'error'
+
+# Kody wyjścia: wszystkie programy zakończone poprawnie, co najmniej jeden błąd, brak programów
+EXIT_OK = 0
+EXIT_FAILURES = 1
+EXIT_NO_SCRIPTS = 2
+
+
+def parse_arguments():
+    argument_parser = argparse.ArgumentParser(description='Run many Atena programs in a pool of worker processes')
+    argument_parser.add_argument('scripts', nargs='+',
+                                 help='program files or glob patterns (quoted, ** matches subdirectories)')
+    argument_parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count(),
+                                 help='number of worker processes')
+    argument_parser.add_argument('-q', '--quiet', action='store_true',
+                                 help='print only the status line of each program, not its output')
+    add_execution_arguments(argument_parser)
+    add_cache_arguments(argument_parser)
+    return argument_parser.parse_args()
+
+
+# Ustawienia wykonania programów wspólne dla batch.py, fork_server.py i daemon.py
+def add_execution_arguments(argument_parser):
+    argument_parser.add_argument('-b', '--backend', choices=BACKENDS, default='tree', help='execution engine')
+    argument_parser.add_argument('--max-stack', type=int, default=DEFAULT_MAX_STACK_SIZE,
+                                 help='maximum number of pending tasks of the stack backend')
+    argument_parser.add_argument('-O', '--optimize', type=int, choices=OPTIMIZATION_LEVELS, default=0,
+                                 help='optimization level')
+    argument_parser.add_argument('--inline-size', type=int, default=DEFAULT_INLINE_THRESHOLD,
+                                 help='largest function body (in AST nodes) inlined at call sites with -O 2')
+    argument_parser.add_argument('--memo-size', type=int, default=DEFAULT_MEMO_CACHE_SIZE,
+                                 help='maximum number of results remembered for each "memo fun" function')
+
+
+# Opcje cache sparsowanych programów zapisywanego na dysku (AstCache)
+def add_cache_arguments(argument_parser):
+    argument_parser.add_argument('--no-cache', action='store_true', help='do not use the parsed program cache')
+    argument_parser.add_argument('--cache-dir', default=None, help='directory for the parsed program (.atc) cache')
+    argument_parser.add_argument('--cache-size', type=int, default=DEFAULT_MAX_ENTRIES,
+                                 help='maximum number of cached programs')
+
+
+# Argumenty będące wzorcami są rozwijane (posortowane), pozostałe traktowane jako ścieżki plików
+def expand_scripts(patterns):
+    scripts = []
+    for pattern in patterns:
+        if glob.has_magic(pattern):
+            scripts.extend(sorted(glob.glob(pattern, recursive=True)))
+        else:
+            scripts.append(pattern)
+    return scripts
+
+
+class ScriptResult:
+    def __init__(self, path, status, output, error, elapsed):
+        self.path = path
+        self.status = status
+        # Wyjście programu razem z komunikatami log.error, w kolejności ich wypisania
+        self.output = output
+        # Komunikat błędu, który main.py wypisałby po wyjściu programu
+        self.error = error
+        self.elapsed = elapsed
+
+    def __str__(self):
+        return f'{self.path}: {self.status} ({self.elapsed * 1000:.1f} ms)'
+
+
+# Komunikaty log.error wykonywanego programu trafiają do jego wyjścia, a nie do wspólnego stderr
+class OutputLogHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.output = None
+
+    def emit(self, record):
+        if self.output is not None:
+            self.output.write(self.format(record) + '\n')
+
+
+# Stan procesu roboczego: ustawienia wykonania i obsługa logów, tworzone raz przez init_worker
+worker_settings = None
+worker_log_handler = None
+
+
+def init_worker(settings):
+    global worker_settings, worker_log_handler
+    worker_settings = settings
+    worker_log_handler = OutputLogHandler()
+    worker_log_handler.setFormatter(logging.Formatter('%(message)s'))
+    for handler in list(log.handlers):
+        log.removeHandler(handler)
+    log.addHandler(worker_log_handler)
+
+
+# Jak main.load_program, ale z informacją o błędzie składniowym. W cache są wyłącznie programy
+# sparsowane bez błędów
+def load_script(source, settings):
+    cache = None if settings.no_cache else AstCache(settings.cache_dir, settings.cache_size)
+    if cache is not None:
+        program = cache.load(source)
+        if program is not None:
+            return program, False
+
+    parser = Parser()
+    program = parser.parse(source, False)
+    parse_failed = program is None or parser.last_parse_failed()
+    if cache is not None and not parse_failed:
+        cache.store(source, program)
+    return program, parse_failed
+
+
+def run_script(path):
+    settings = worker_settings
+    output = MemoryOutput()
+    worker_log_handler.output = output
+    status = STATUS_OK
+    error = None
+    start = time.perf_counter()
+    # Wypisywanie poza funkcją print (np. 'Error: Unexpected EOF' z parsera) również trafia do wyjścia programu
+    with contextlib.redirect_stdout(output):
+        try:
+            with open(path, mode='r', encoding='utf8') as file:
+                source = file.read()
+            program, parse_failed = load_script(source, settings)
+            if parse_failed:
+                status = STATUS_SYNTAX_ERROR
+            if program is not None:
+                interpreter = Interpreter(settings.memo_size, output)
+                run_program(interpreter, program, settings.backend, settings.optimize, settings.inline_size,
+                            settings.max_stack)
+        except ReturnException:
+            status = STATUS_ERROR
+            error = 'Error: Return statement outside of function'
+        except Exception as e:
+            status = STATUS_ERROR
+            error = str(e)
+    elapsed = time.perf_counter() - start
+    worker_log_handler.output = None
+    return ScriptResult(path, status, output.getvalue(), error, elapsed)
+
+
+def print_result(result, quiet):
+    print(f'== {result}')
+    if not quiet:
+        sys.stdout.write(result.output)
+        if result.error is not None:
+            print(result.error)
+    sys.stdout.flush()
+
+
+def run_batch(scripts, settings, jobs):
+    counts = {STATUS_OK: 0, STATUS_SYNTAX_ERROR: 0, STATUS_ERROR: 0}
+    start = time.perf_counter()
+    with multiprocessing.Pool(jobs, init_worker, (settings,)) as pool:
+        for result in pool.imap_unordered(run_script, scripts):
+            counts[result.status] += 1
+            print_result(result, settings.quiet)
+    elapsed = time.perf_counter() - start
+
+    summary = ', '.join(f'{count} {status}' for status, count in counts.items())
+    print(f'{len(scripts)} programs in {elapsed:.2f} s: {summary}')
+    return EXIT_OK if counts[STATUS_OK] == len(scripts) else EXIT_FAILURES
+
+
+if __name__ == '__main__':
+    arguments = parse_arguments()
+    script_paths = expand_scripts(arguments.scripts)
+    if not script_paths:
+        log.error('Error: No programs match the given patterns')
+        sys.exit(EXIT_NO_SCRIPTS)
+    sys.exit(run_batch(script_paths, arguments, max(1, arguments.jobs)))
@@ -0,0 +1,391 @@
+from interpreter_logic import ast_expression_nodes as expr_node
+
+# Kompilator drzewa AST do kodu bajtowego wykonywanego przez vm.VirtualMachine.
+# Każda instrukcja to para (kod operacji, argument). Zmienne lokalne funkcji i bloków dostają
+# numery slotów w ramce już podczas kompilacji, zmienne globalne są odczytywane po nazwie
+
+LOAD_CONST = 0
+LOAD_LOCAL = 1
+STORE_LOCAL = 2
+LOAD_GLOBAL = 3
+STORE_GLOBAL = 4
+DEFINE_GLOBAL = 5
+DEFINE_LOCAL = 6
+POP = 7
+JUMP = 8
+JUMP_IF_FALSE = 9
+JUMP_IF_FALSE_OR_POP = 10
+JUMP_IF_TRUE_OR_POP = 11
+ADD = 12
+SUBTRACT = 13
+MULTIPLY = 14
+DIVIDE = 15
+LESS = 16
+LESS_EQUAL = 17
+GREATER = 18
+GREATER_EQUAL = 19
+IS = 20
+IS_NOT = 21
+NEGATE = 22
+NOT = 23
+BUILD_LIST = 24
+SUBSCRIPT_LOCAL = 25
+SUBSCRIPT_GLOBAL = 26
+STORE_INDEX_LOCAL = 27
+STORE_INDEX_GLOBAL = 28
+CALL = 29
+RETURN = 30
+HALT = 31
+REDECLARATION = 32
+# Superinstrukcje tworzone przez BytecodeCompiler.emit z częstych par instrukcji
+STORE_LOCAL_POP = 33
+ADD_CONST = 34
+SUBTRACT_CONST = 35
+LESS_CONST = 36
+LESS_EQUAL_CONST = 37
+GREATER_CONST = 38
+GREATER_EQUAL_CONST = 39
+SUBSCRIPT_LOCAL_LOCAL = 40
+STORE_INDEX_LOCAL_POP = 41
+LOCAL_ADD_CONST = 42
+LOCAL_SUBTRACT_CONST = 43
+LOCAL_LESS_CONST = 44
+LOCAL_LESS_EQUAL_CONST = 45
+LOCAL_GREATER_CONST = 46
+LOCAL_GREATER_EQUAL_CONST = 47
+# 'return f(...)' wewnątrz f - wykonywane w bieżącej ramce, jeżeli f nadal wskazuje na tę funkcję
+TAIL_CALL = 48
+
+OPCODE_NAMES = {value: name for name, value in globals().items() if isinstance(value, int) and name.isupper()}
+
+BINARY_OPCODES = {
+    '+': ADD,
+    '-': SUBTRACT,
+    '*': MULTIPLY,
+    '/': DIVIDE,
+    '<': LESS,
+    '<=': LESS_EQUAL,
+    '>': GREATER,
+    '>=': GREATER_EQUAL,
+    'is': IS,
+    'is not': IS_NOT,
+}
+
+UNARY_OPCODES = {
+    '-': NEGATE,
+    'not': NOT,
+}
+
+# Operacja binarna poprzedzona LOAD_CONST -> operacja ze stałą jako argumentem
+CONSTANT_OPERAND_OPCODES = {
+    ADD: ADD_CONST,
+    SUBTRACT: SUBTRACT_CONST,
+    LESS: LESS_CONST,
+    LESS_EQUAL: LESS_EQUAL_CONST,
+    GREATER: GREATER_CONST,
+    GREATER_EQUAL: GREATER_EQUAL_CONST,
+}
+
+# Operacja ze stałą poprzedzona LOAD_LOCAL -> operacja na zmiennej lokalnej i stałej
+LOCAL_OPERAND_OPCODES = {
+    ADD_CONST: LOCAL_ADD_CONST,
+    SUBTRACT_CONST: LOCAL_SUBTRACT_CONST,
+    LESS_CONST: LOCAL_LESS_CONST,
+    LESS_EQUAL_CONST: LOCAL_LESS_EQUAL_CONST,
+    GREATER_CONST: LOCAL_GREATER_CONST,
+    GREATER_EQUAL_CONST: LOCAL_GREATER_EQUAL_CONST,
+}
+
+EXPRESSION_NODES = (expr_node.AstBinary, expr_node.AstGrouping, expr_node.AstLiteral, expr_node.AstUnary,
+                    expr_node.AstExprVariable, expr_node.AstAssignment, expr_node.AstListAssignment,
+                    expr_node.AstLogic, expr_node.AstCall, expr_node.AstSubscript, expr_node.AstList)
+
+
+class CodeObject:
+    def __init__(self, name, instructions, local_count):
+        self.name = name
+        self.instructions = instructions
+        self.local_count = local_count
+
+    def disassemble(self):
+        lines = [f'<code {self.name}, locals: {self.local_count}>']
+        for offset, (opcode, argument) in enumerate(self.instructions):
+            if isinstance(argument, CompiledFunction):
+                argument = f'<function {argument.name}>'
+            lines.append(f'{offset:5} {OPCODE_NAMES[opcode]:<20} {"" if argument is None else argument}')
+        return '\n'.join(lines)
+
+
+# Funkcja języka skompilowana do kodu bajtowego
+class CompiledFunction:
+    def __init__(self, name, arity, code, declaration):
+        self.name = name
+        self.arity = arity
+        self.code = code
+        self.instructions = code.instructions
+        self.local_count = code.local_count
+        # Deklaracja identyfikuje cache wyników funkcji 'memo fun' w Interpreter.memo_caches
+        self.declaration = declaration
+        self.memoized = declaration.memoized
+
+    def call(self, interpreter, arguments):
+        # Wywołanie spoza maszyny wirtualnej (np. z funkcji wbudowanej)
+        from interpreter_logic.vm import VirtualMachine
+
+        return VirtualMachine(interpreter).call_function(self, arguments)
+
+
+class BytecodeCompiler:
+    def __init__(self, name='<program>', parameters=None):
+        self.name = name
+        self.instructions = []
+        self.local_count = 0
+        # Stos zakresów - słowniki nazwa -> slot. Pusty stos oznacza zakres globalny
+        self.scopes = []
+        # Pozycje, do których prowadzą skoki - instrukcji na tych pozycjach nie wolno łączyć z poprzednimi
+        self.labels = set()
+
+        if parameters is not None:
+            self.begin_scope()
+            for parameter in parameters:
+                if parameter in self.scopes[-1]:
+                    self.emit(REDECLARATION, parameter)
+                else:
+                    self.declare_local(parameter)
+
+    def compile_program(self, program):
+        program.accept(self)
+        self.emit(HALT)
+        return self.code_object()
+
+    def compile_function(self, declaration):
+        function_compiler = BytecodeCompiler(declaration.name, declaration.params)
+        for statement in declaration.body:
+            statement.accept(function_compiler)
+        function_compiler.emit(LOAD_CONST, None)
+        function_compiler.emit(RETURN)
+        return CompiledFunction(declaration.name, len(declaration.params), function_compiler.code_object(),
+                                declaration)
+
+    def code_object(self):
+        return CodeObject(self.name, [tuple(instruction) for instruction in self.instructions], self.local_count)
+
+    def emit(self, opcode, argument=None):
+        if self.instructions and len(self.instructions) not in self.labels:
+            previous = self.instructions[-1]
+            if opcode == POP and previous[0] == STORE_LOCAL:
+                previous[0] = STORE_LOCAL_POP
+                return len(self.instructions) - 1
+            if opcode == POP and previous[0] == STORE_INDEX_LOCAL:
+                previous[0] = STORE_INDEX_LOCAL_POP
+                return len(self.instructions) - 1
+            if opcode in CONSTANT_OPERAND_OPCODES and previous[0] == LOAD_CONST:
+                previous[0] = CONSTANT_OPERAND_OPCODES[opcode]
+                self.fuse_local_operand()
+                return len(self.instructions) - 1
+            if opcode == SUBSCRIPT_LOCAL and previous[0] == LOAD_LOCAL:
+                previous[0] = SUBSCRIPT_LOCAL_LOCAL
+                previous[1] = (argument, previous[1])
+                return len(self.instructions) - 1
+
+        self.instructions.append([opcode, argument])
+        return len(self.instructions) - 1
+
+    def fuse_local_operand(self):
+        if len(self.instructions) < 2 or len(self.instructions) - 1 in self.labels:
+            return
+        load, operation = self.instructions[-2:]
+        if load[0] == LOAD_LOCAL:
+            load[0] = LOCAL_OPERAND_OPCODES[operation[0]]
+            load[1] = (load[1], operation[1])
+            self.instructions.pop()
+
+    def label(self):
+        self.labels.add(len(self.instructions))
+        return len(self.instructions)
+
+    def patch_jump(self, position):
+        self.instructions[position][1] = self.label()
+
+    def begin_scope(self):
+        self.scopes.append({})
+
+    def end_scope(self):
+        self.scopes.pop()
+
+    def declare_local(self, name):
+        slot = self.local_count
+        self.local_count += 1
+        self.scopes[-1][name] = slot
+        return slot
+
+    def resolve(self, name):
+        for scope in reversed(self.scopes):
+            if name in scope:
+                return scope[name]
+        return None
+
+    def define(self, name):
+        if not self.scopes:
+            self.emit(DEFINE_GLOBAL, name)
+        elif name in self.scopes[-1]:
+            # Błąd redeklaracji jest zgłaszany w momencie wykonania, tak jak w Interpreter
+            self.emit(REDECLARATION, name)
+        else:
+            self.emit(DEFINE_LOCAL, self.declare_local(name))
+
+    def emit_load(self, name):
+        slot = self.resolve(name)
+        if slot is None:
+            self.emit(LOAD_GLOBAL, name)
+        else:
+            self.emit(LOAD_LOCAL, slot)
+
+    def visit_program(self, program):
+        for statement in program.statements:
+            statement.accept(self)
+
+    def visit_statement(self, statement):
+        statement.expression.accept(self)
+        # Parser opakowuje w AstStatement również instrukcje (if, while, return), które nie zostawiają wartości
+        if isinstance(statement.expression, EXPRESSION_NODES):
+            self.emit(POP)
+
+    def visit_stmt_variable(self, statement):
+        if statement.initializer is None:
+            self.emit(LOAD_CONST, None)
+        else:
+            statement.initializer.accept(self)
+        self.define(statement.name)
+
+    def visit_block(self, block):
+        self.begin_scope()
+        for statement in block.statements:
+            statement.accept(self)
+        self.end_scope()
+
+    # Warunek instrukcji jest sprawdzany tylko co do prawdziwości, więc 'and' można skompilować
+    # do ciągu skoków warunkowych bez zostawiania wartości pośrednich na stosie
+    def compile_condition(self, condition):
+        if isinstance(condition, expr_node.AstLogic) and condition.operator == 'and':
+            return self.compile_condition(condition.left) + self.compile_condition(condition.right)
+        if isinstance(condition, expr_node.AstGrouping):
+            return self.compile_condition(condition.inside_expression)
+        condition.accept(self)
+        return [self.emit(JUMP_IF_FALSE)]
+
+    def patch_jumps(self, positions):
+        for position in positions:
+            self.patch_jump(position)
+
+    def visit_if(self, if_statement):
+        else_jumps = self.compile_condition(if_statement.condition)
+        if_statement.then_branch.accept(self)
+        if if_statement.else_branch is None:
+            self.patch_jumps(else_jumps)
+        else:
+            end_jump = self.emit(JUMP)
+            self.patch_jumps(else_jumps)
+            if_statement.else_branch.accept(self)
+            self.patch_jump(end_jump)
+
+    def visit_while(self, while_statement):
+        loop_start = self.label()
+        exit_jumps = self.compile_condition(while_statement.condition)
+        while_statement.body.accept(self)
+        self.emit(JUMP, loop_start)
+        self.patch_jumps(exit_jumps)
+
+    # Warunek i inkrementacja pętli while są już skompilowane do superinstrukcji na zmiennej lokalnej
+    def visit_counted_loop(self, loop):
+        loop.fallback.accept(self)
+
+    def visit_function_declaration(self, declaration):
+        # Funkcje nie domykają zmiennych lokalnych, więc obiekt funkcji może powstać już podczas kompilacji
+        self.emit(LOAD_CONST, self.compile_function(declaration))
+        self.define(declaration.name)
+
+    def visit_return(self, return_statement):
+        if return_statement.tail_call:
+            call = return_statement.value
+            self.emit_load(call.name)
+            for argument in call.arguments:
+                argument.accept(self)
+            self.emit(TAIL_CALL, (len(call.arguments), call.name))
+        elif return_statement.value is None:
+            self.emit(LOAD_CONST, None)
+        else:
+            return_statement.value.accept(self)
+        self.emit(RETURN)
+
+    def visit_literal(self, expression):
+        self.emit(LOAD_CONST, expression.value)
+
+    def visit_list(self, list_expression):
+        for element in list_expression.values:
+            element.accept(self)
+        self.emit(BUILD_LIST, len(list_expression.values))
+
+    def visit_grouping(self, expression):
+        expression.inside_expression.accept(self)
+
+    def visit_unary(self, expression):
+        expression.right.accept(self)
+        self.emit(UNARY_OPCODES[expression.operator])
+
+    def visit_binary(self, expression):
+        expression.left.accept(self)
+        expression.right.accept(self)
+        self.emit(BINARY_OPCODES[expression.operator])
+
+    def visit_logic(self, expression):
+        expression.left.accept(self)
+        if expression.operator == 'and':
+            end_jump = self.emit(JUMP_IF_FALSE_OR_POP)
+        else:
+            end_jump = self.emit(JUMP_IF_TRUE_OR_POP)
+        expression.right.accept(self)
+        self.patch_jump(end_jump)
+
+    def visit_expr_variable(self, variable):
+        self.emit_load(variable.name)
+
+    def visit_assignment(self, expression):
+        expression.value.accept(self)
+        slot = self.resolve(expression.name)
+        if slot is None:
+            self.emit(STORE_GLOBAL, expression.name)
+        else:
+            self.emit(STORE_LOCAL, slot)
+
+    def visit_list_assignment(self, expression):
+        expression.value.accept(self)
+        expression.index.accept(self)
+        slot = self.resolve(expression.name)
+        if slot is None:
+            self.emit(STORE_INDEX_GLOBAL, expression.name)
+        else:
+            self.emit(STORE_INDEX_LOCAL, slot)
+
+    def visit_subscript(self, subscript_expression):
+        subscript_expression.index.accept(self)
+        slot = self.resolve(subscript_expression.name)
+        if slot is None:
+            self.emit(SUBSCRIPT_GLOBAL, subscript_expression.name)
+        else:
+            self.emit(SUBSCRIPT_LOCAL, slot)
+
+    # Funkcje czyste wywołujące inne funkcje mają cache wyników, więc powtórne wywołanie jest tanie
+    def visit_hoisted_call(self, expression):
+        expression.call.accept(self)
+
+    def visit_call(self, call_expression):
+        # Funkcja jest pobierana przed obliczeniem argumentów, tak jak w Interpreter.visit_call
+        self.emit_load(call_expression.name)
+        for argument in call_expression.arguments:
+            argument.accept(self)
+        self.emit(CALL, (len(call_expression.arguments), call_expression.name))
+
+
+def compile_program(program):
+    return BytecodeCompiler().compile_program(program)
@@ -0,0 +1,456 @@
+from interpreter_logic import ast_expression_nodes as expr_node
+from interpreter_logic import operators
+from interpreter_logic.environment import Environment
+from interpreter_logic.function import ReturnException, TailCallException
+from interpreter_logic.native import direct_implementation
+from interpreter_logic.numeric_array import LIST_TYPES, new_list
+from interpreter_logic.resolver import declares_variables
+from logging_config import log
+
+
+# Funkcja języka, której ciało zostało skompilowane do domknięć
+class ClosureFunction:
+    def __init__(self, declaration, body):
+        self.declaration = declaration
+        self.name = declaration.name
+        self.params = declaration.params
+        self.body = body
+        self.arity = len(self.params)
+
+    def call(self, interpreter, arguments):
+        if self.declaration.memoized:
+            return interpreter.memo_cache(self.declaration).call(
+                lambda cached_arguments: self.execute(interpreter, cached_arguments), arguments)
+        return self.execute(interpreter, arguments)
+
+    def execute(self, interpreter, arguments):
+        while True:
+            function_environment = Environment(interpreter.globals)
+            for param, argument in zip(self.params, arguments):
+                function_environment.define(param, argument)
+
+            try:
+                for statement in self.body:
+                    statement(function_environment)
+                return None
+            except ReturnException as function_return:
+                return function_return.value
+            except TailCallException as tail_call:
+                arguments = tail_call.arguments
+
+
+# Kompiluje każdy węzeł drzewa jednokrotnie do domknięcia przyjmującego bieżące środowisko.
+# Wykonanie nie przechodzi już przez accept(), porównania operatorów zapisanych jako tekst
+# ani odczyty atrybutów węzłów - wszystkie decyzje zapadają podczas kompilacji.
+# Semantyka (środowiska, komunikaty błędów) jest taka sama jak w Interpreter
+class ClosureCompiler:
+    def __init__(self, interpreter):
+        self.interpreter = interpreter
+
+    def compile(self, node):
+        return node.accept(self)
+
+    def execute(self, statement):
+        self.compile(statement)(self.interpreter.environment)
+
+    def compile_all(self, nodes):
+        return tuple(self.compile(node) for node in nodes)
+
+    def visit_program(self, program):
+        statements = self.compile_all(program.statements)
+
+        def program_closure(environment):
+            for statement in statements:
+                statement(environment)
+
+        return program_closure
+
+    def visit_statement(self, statement):
+        return self.compile(statement.expression)
+
+    def visit_stmt_variable(self, statement):
+        name = statement.name
+        if statement.initializer is None:
+            def define_closure(environment):
+                environment.define(name)
+        else:
+            initializer = self.compile(statement.initializer)
+
+            def define_closure(environment):
+                environment.define(name, initializer(environment))
+
+        return define_closure
+
+    def visit_block(self, block):
+        statements = self.compile_all(block.statements)
+
+        if not declares_variables(block.statements):
+            def block_closure(environment):
+                for statement in statements:
+                    statement(environment)
+
+            return block_closure
+
+        def block_closure(environment):
+            block_environment = Environment(environment)
+            for statement in statements:
+                statement(block_environment)
+
+        return block_closure
+
+    def visit_if(self, if_statement):
+        condition = self.compile(if_statement.condition)
+        then_branch = self.compile(if_statement.then_branch)
+        if if_statement.else_branch is None:
+            def if_closure(environment):
+                if condition(environment):
+                    then_branch(environment)
+        else:
+            else_branch = self.compile(if_statement.else_branch)
+
+            def if_closure(environment):
+                if condition(environment):
+                    then_branch(environment)
+                else:
+                    else_branch(environment)
+
+        return if_closure
+
+    def visit_while(self, while_statement):
+        condition = self.compile(while_statement.condition)
+        body = self.compile(while_statement.body)
+
+        def while_closure(environment):
+            while condition(environment):
+                body(environment)
+
+        return while_closure
+
+    # Licznik jest zapisywany wprost w słowniku środowiska, w którym zmienna została zadeklarowana
+    def visit_counted_loop(self, loop):
+        name = loop.name
+        inclusive = loop.operator == '<='
+        bound = self.compile(loop.bound)
+        body = self.compile(loop.body)
+        fallback = self.compile(loop.fallback)
+
+        def counted_loop_closure(environment):
+            declaring_environment = environment
+            while name not in declaring_environment.variables:
+                declaring_environment = declaring_environment.enclosing
+            variables = declaring_environment.variables
+            start = variables[name]
+            end = bound(environment)
+            if type(start) is not int or type(end) is not int:
+                return fallback(environment)
+
+            if inclusive:
+                end += 1
+            for counter in range(start, end):
+                variables[name] = counter
+                body(environment)
+            variables[name] = max(start, end)
+
+        return counted_loop_closure
+
+    def visit_function_declaration(self, declaration):
+        name = declaration.name
+        function_object = ClosureFunction(declaration, self.compile_all(declaration.body))
+
+        def declaration_closure(environment):
+            environment.define(name, function_object)
+
+        return declaration_closure
+
+    def visit_return(self, return_statement):
+        if return_statement.tail_call:
+            return self.compile_tail_call(return_statement)
+
+        if return_statement.value is None:
+            def return_closure(environment):
+                raise ReturnException(None)
+        else:
+            value = self.compile(return_statement.value)
+
+            def return_closure(environment):
+                raise ReturnException(value(environment))
+
+        return return_closure
+
+    # Wywołanie ogonowe - jak w Interpreter.visit_return: jeżeli nazwa nadal wskazuje na funkcję
+    # skompilowaną z tej deklaracji, ClosureFunction.execute wykona ciało ponownie w pętli
+    def compile_tail_call(self, return_statement):
+        call = return_statement.value
+        name = call.name
+        function_id = return_statement.function_id
+        arguments = self.compile_all(call.arguments)
+        value = self.compile(return_statement.value)
+        global_environment = self.interpreter.globals
+
+        def tail_call_closure(environment):
+            function_object = global_environment.get(name)
+            if type(function_object) is ClosureFunction and function_object.declaration.function_id == function_id:
+                raise TailCallException([argument(environment) for argument in arguments])
+            raise ReturnException(value(environment))
+
+        return tail_call_closure
+
+    def visit_literal(self, expression):
+        value = expression.value
+        return lambda environment: value
+
+    def visit_list(self, list_expression):
+        values = self.compile_all(list_expression.values)
+        return lambda environment: new_list([value(environment) for value in values])
+
+    def visit_grouping(self, expression):
+        return self.compile(expression.inside_expression)
+
+    def visit_unary(self, expression):
+        right = self.compile(expression.right)
+        operation = operators.UNARY_OPERATORS[expression.operator]
+        return lambda environment: operation(right(environment))
+
+    def visit_binary(self, expression):
+        operator = expression.operator
+        left = self.compile(expression.left)
+        right = self.compile(expression.right)
+
+        if operator == 'is' or operator == 'is not':
+            are_equal = self.interpreter.are_equal
+            if operator == 'is':
+                return lambda environment: are_equal(left(environment), right(environment))
+            return lambda environment: not are_equal(left(environment), right(environment))
+
+        # Stała po prawej stronie (np. n - 1, i < 10) nie wymaga wywołania domknięcia
+        if isinstance(expression.right, expr_node.AstLiteral):
+            return self.constant_binary(operator, left, expression.right.value)
+
+        if operator == '+':
+            def binary_closure(environment):
+                left_value = left(environment)
+                right_value = right(environment)
+                if type(left_value) is int and type(right_value) is int:
+                    return left_value + right_value
+                return operators.add(left_value, right_value)
+        elif operator == '-':
+            def binary_closure(environment):
+                left_value = left(environment)
+                right_value = right(environment)
+                if type(left_value) is int and type(right_value) is int:
+                    return left_value - right_value
+                return operators.subtract(left_value, right_value)
+        elif operator == '<':
+            def binary_closure(environment):
+                left_value = left(environment)
+                right_value = right(environment)
+                if type(left_value) is int and type(right_value) is int:
+                    return left_value < right_value
+                return operators.less(left_value, right_value)
+        elif operator == '>':
+            def binary_closure(environment):
+                left_value = left(environment)
+                right_value = right(environment)
+                if type(left_value) is int and type(right_value) is int:
+                    return left_value > right_value
+                return operators.greater(left_value, right_value)
+        else:
+            operation = operators.BINARY_OPERATORS[operator]
+
+            def binary_closure(environment):
+                return operation(left(environment), right(environment))
+
+        return binary_closure
+
+    @staticmethod
+    def constant_binary(operator, left, constant):
+        operation = operators.BINARY_OPERATORS[operator]
+        if type(constant) is not int:
+            return lambda environment: operation(left(environment), constant)
+
+        if operator == '+':
+            def binary_closure(environment):
+                left_value = left(environment)
+                if type(left_value) is int:
+                    return left_value + constant
+                return operation(left_value, constant)
+        elif operator == '-':
+            def binary_closure(environment):
+                left_value = left(environment)
+                if type(left_value) is int:
+                    return left_value - constant
+                return operation(left_value, constant)
+        elif operator == '<':
+            def binary_closure(environment):
+                left_value = left(environment)
+                if type(left_value) is int:
+                    return left_value < constant
+                return operation(left_value, constant)
+        elif operator == '<=':
+            def binary_closure(environment):
+                left_value = left(environment)
+                if type(left_value) is int:
+                    return left_value <= constant
+                return operation(left_value, constant)
+        elif operator == '>':
+            def binary_closure(environment):
+                left_value = left(environment)
+                if type(left_value) is int:
+                    return left_value > constant
+                return operation(left_value, constant)
+        elif operator == '>=':
+            def binary_closure(environment):
+                left_value = left(environment)
+                if type(left_value) is int:
+                    return left_value >= constant
+                return operation(left_value, constant)
+        else:
+            def binary_closure(environment):
+                return operation(left(environment), constant)
+
+        return binary_closure
+
+    def visit_logic(self, expression):
+        left = self.compile(expression.left)
+        right = self.compile(expression.right)
+        if expression.operator == 'and':
+            def logic_closure(environment):
+                left_value = left(environment)
+                if not left_value:
+                    return left_value
+                return right(environment)
+        else:
+            def logic_closure(environment):
+                left_value = left(environment)
+                if left_value:
+                    return left_value
+                return right(environment)
+
+        return logic_closure
+
+    def visit_expr_variable(self, variable):
+        name = variable.name
+        return lambda environment: environment.get(name)
+
+    def visit_assignment(self, expression):
+        name = expression.name
+        value = self.compile(expression.value)
+
+        def assignment_closure(environment):
+            assigned_value = value(environment)
+            environment.assign(name, assigned_value)
+            return assigned_value
+
+        return assignment_closure
+
+    def visit_list_assignment(self, expression):
+        name = expression.name
+        value = self.compile(expression.value)
+        index = self.compile(expression.index)
+
+        def list_assignment_closure(environment):
+            assigned_value = value(environment)
+            environment.assign(name, assigned_value, index(environment))
+            return assigned_value
+
+        return list_assignment_closure
+
+    def visit_subscript(self, subscript_expression):
+        name = subscript_expression.name
+        index = self.compile(subscript_expression.index)
+
+        def subscript_closure(environment):
+            index_value = index(environment)
+            if type(index_value) is int:
+                try:
+                    list_values = environment.get(name)
+                except RuntimeError:
+                    list_values = None
+                if type(list_values) is list and 0 <= index_value < len(list_values):
+                    return list_values[index_value]
+            # Wolna ścieżka zgłasza te same błędy co Interpreter.visit_subscript
+            return operators.subscript(index_value, lambda: environment.get(name))
+
+        return subscript_closure
+
+    def visit_hoisted_call(self, expression):
+        call = self.compile(expression.call)
+        hoisted_values = []
+
+        def hoisted_call_closure(environment):
+            if hoisted_values:
+                return hoisted_values[0]
+            value = call(environment)
+            if type(value) not in LIST_TYPES:
+                hoisted_values.append(value)
+            return value
+
+        return hoisted_call_closure
+
+    def visit_call(self, call_expression):
+        interpreter = self.interpreter
+        name = call_expression.name
+        arguments = self.compile_all(call_expression.arguments)
+
+        def check_arity(function_object, argument_values):
+            # Arity = None - funkcja przyjmuje zmienną liczbę argumentów
+            if function_object.arity is not None and len(argument_values) != function_object.arity:
+                log.error('Error: Function arity mismatch')
+                raise RuntimeError(f'Call with {len(argument_values)} arguments to a function "{name}" '
+                                   f'with arity {function_object.arity}')
+
+        if call_expression.slot is not None:
+            def call_closure(environment):
+                function_object = environment.get(name)
+                argument_values = [argument(environment) for argument in arguments]
+                try:
+                    check_arity(function_object, argument_values)
+                    return function_object.call(interpreter, argument_values)
+                except NotImplementedError:
+                    log.error('Error: Called object not callable')
+                    raise RuntimeError('Object is not callable')
+
+            return call_closure
+
+        # Cache miejsca wywołania funkcji globalnej (wersja środowiska, funkcja, punkt wejścia funkcji
+        # wbudowanej) - jak w Interpreter.visit_call
+        global_environment = interpreter.globals
+        cache = [None, None, None]
+        direct_call = self.compile_direct_call(arguments)
+
+        def global_call_closure(environment):
+            if cache[0] == global_environment.version:
+                if cache[2] is not None:
+                    return direct_call(cache[2], environment)
+                return cache[1].call(interpreter, [argument(environment) for argument in arguments])
+
+            function_object = global_environment.get(name)
+            argument_values = [argument(environment) for argument in arguments]
+            try:
+                check_arity(function_object, argument_values)
+                cache[0] = global_environment.watch(name)
+                cache[1] = function_object
+                cache[2] = direct_implementation(function_object, len(arguments))
+                return function_object.call(interpreter, argument_values)
+            except NotImplementedError:
+                log.error('Error: Called object not callable')
+                raise RuntimeError('Object is not callable')
+
+        return global_call_closure
+
+    # Wywołanie funkcji wbudowanej (native.call_direct) dla liczby argumentów znanej przy kompilacji
+    @staticmethod
+    def compile_direct_call(arguments):
+        if len(arguments) == 0:
+            return lambda implementation, environment: implementation()
+        if len(arguments) == 1:
+            first, = arguments
+            return lambda implementation, environment: implementation(first(environment))
+        if len(arguments) == 2:
+            first, second = arguments
+            return lambda implementation, environment: implementation(first(environment), second(environment))
+        if len(arguments) == 3:
+            first, second, third = arguments
+            return lambda implementation, environment: implementation(first(environment), second(environment),
+                                                                      third(environment))
+        return None
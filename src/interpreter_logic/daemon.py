@@ -0,0 +1,383 @@
+import argparse
+import hashlib
+import logging
+import os
+import queue
+import signal
+import socket
+import sys
+import threading
+import time
+from collections import OrderedDict, deque
+
+from interpreter_logic import batch
+from interpreter_logic.fork_server import read_message, send_message, stop_server
+from interpreter_logic.inliner import clone
+from interpreter_logic.interpreter import Interpreter, ReturnException
+from interpreter_logic.main import run_program
+from interpreter_logic.numeric_array import new_list
+from interpreter_logic.output import MemoryOutput
+from interpreter_logic.parser import Parser
+from logging_config import log
+
+# Długo działający serwer wykonujący programy w wątkach jednego procesu (parser jest
+# wielowątkowy - parser.Parser). Każde żądanie dostaje nowy Interpreter, a sparsowane programy
+# są współdzielone w cache LRU (ProgramCache), więc gorący program nie jest ponownie parsowany.
+#
+# Protokół jak w fork_server.py (gniazdo Unix, jedno żądanie na połączenie, JSON + '\n'):
+#   {"path": "/abs/path/program.at", "argv": ["a", "b"]}   - program z pliku
+#   {"source": "print(1);", "argv": []}                    - program przesłany w żądaniu
+#   {"command": "stats"}                                   - statystyki serwera
+# Odpowiedź na program: {"status": "ok" | "syntax error" | "error" | "busy", "exit_code": ...,
+#   "output": ..., "error": ... | null, "cached": true | false, "elapsed": sekundy}.
+# Argumenty argv są dostępne w programie jako lista napisów w zmiennej globalnej argv
+DEFAULT_CACHE_ENTRIES = 256
+DEFAULT_WORKERS = 4
+DEFAULT_MAX_QUEUE = 64
+MAX_REQUEST_SIZE = 16 * 2 ** 20
+# Czas na przesłanie żądania. Żądania są czytane przez krótko żyjące wątki (po jednym na
+# połączenie), więc wolny lub milczący klient nie wstrzymuje przyjmowania kolejnych połączeń
+REQUEST_TIMEOUT = 5.0
+LATENCY_SAMPLES = 10000
+PERCENTILES = [50, 90, 99]
+
+STATUS_BUSY = 'busy'
+EXIT_BUSY = 2
+
+
+# Cache sparsowanych programów (AstProgram) w pamięci, kluczem jest skrót treści programu.
+# Przechowywane drzewo nie jest nigdy wykonywane - optymalizacje i resolver modyfikują węzły,
+# więc każde żądanie dostaje własną kopię (inliner.clone)
+class ProgramCache:
+    def __init__(self, max_entries=DEFAULT_CACHE_ENTRIES):
+        if max_entries < 1:
+            raise ValueError('Program cache must hold at least one entry')
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    # Zwraca (program, czy wystąpił błąd składniowy, czy program był w cache)
+    def load(self, source):
+        key = hashlib.sha256(source.encode('utf8')).hexdigest()
+        with self.lock:
+            program = self.entries.get(key)
+            if program is not None:
+                self.hits += 1
+                self.entries.move_to_end(key)
+            else:
+                self.misses += 1
+        if program is not None:
+            return clone(program), False, True
+
+        parser = Parser()
+        program = parser.parse(source, False)
+        # Program z błędem składniowym jest niekompletny - wykonujemy go (jak main.py), ale nie zapamiętujemy
+        if program is None or parser.last_parse_failed():
+            return program, True, False
+        with self.lock:
+            self.entries[key] = program
+            self.entries.move_to_end(key)
+            if len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        return clone(program), False, False
+
+
+def percentiles(samples):
+    ordered = sorted(samples)
+    if not ordered:
+        return {f'p{percentile}': None for percentile in PERCENTILES}
+    return {f'p{percentile}': ordered[min(len(ordered) - 1, len(ordered) * percentile // 100)] * 1000
+            for percentile in PERCENTILES}
+
+
+# Wyjście programu wykonywanego przez bieżący wątek. Wypisywanie poza funkcją print
+# (sys.stdout) i komunikaty log.error trafiają do niego zamiast do wspólnych strumieni procesu
+thread_outputs = threading.local()
+
+
+def current_output():
+    return getattr(thread_outputs, 'output', None)
+
+
+class ThreadStream:
+    def __init__(self, stream):
+        self.stream = stream
+
+    def write(self, text):
+        output = current_output()
+        if output is None:
+            return self.stream.write(text)
+        output.write(text)
+        return len(text)
+
+    def flush(self):
+        if current_output() is None:
+            self.stream.flush()
+
+    def isatty(self):
+        return False
+
+
+class ThreadLogHandler(logging.Handler):
+    def __init__(self, fallback_handlers):
+        super().__init__()
+        self.setFormatter(logging.Formatter('%(message)s'))
+        self.fallback_handlers = fallback_handlers
+
+    def emit(self, record):
+        output = current_output()
+        if output is None:
+            for handler in self.fallback_handlers:
+                handler.handle(record)
+        else:
+            output.write(self.format(record) + '\n')
+
+
+class Daemon:
+    def __init__(self, settings, workers=DEFAULT_WORKERS, max_queue=DEFAULT_MAX_QUEUE,
+                 cache_entries=DEFAULT_CACHE_ENTRIES):
+        self.settings = settings
+        self.workers = workers
+        self.programs = ProgramCache(cache_entries)
+        # Żądania czekające na wolny wątek; przy pełnej kolejce serwer od razu odpowiada 'busy'
+        self.requests = queue.Queue(max_queue)
+        # Połączenia, z których jest właśnie czytane żądanie; ponad limit serwer od razu odpowiada 'busy'
+        self.readers = threading.BoundedSemaphore(max_queue + workers)
+        self.lock = threading.Lock()
+        self.active = 0
+        self.completed = 0
+        self.rejected = 0
+        self.failed = 0
+        # Czas od odebrania żądania do rozpoczęcia wykonania (kolejka, cache, kopia drzewa) i do wysłania odpowiedzi
+        self.dispatch_times = deque(maxlen=LATENCY_SAMPLES)
+        self.latencies = deque(maxlen=LATENCY_SAMPLES)
+
+    def stats(self):
+        with self.lock:
+            dispatch_times = list(self.dispatch_times)
+            latencies = list(self.latencies)
+            stats = {
+                'completed': self.completed,
+                'failed': self.failed,
+                'rejected': self.rejected,
+                'active': self.active,
+            }
+        stats['queue_depth'] = self.requests.qsize()
+        stats['workers'] = self.workers
+        stats['cache_hits'] = self.programs.hits
+        stats['cache_misses'] = self.programs.misses
+        stats['cache_entries'] = len(self.programs.entries)
+        stats['dispatch_ms'] = percentiles(dispatch_times)
+        stats['latency_ms'] = percentiles(latencies)
+        return stats
+
+    def execute(self, request, received):
+        settings = self.settings
+        output = MemoryOutput()
+        status = batch.STATUS_OK
+        error = None
+        cached = False
+        thread_outputs.output = output
+        try:
+            argv = request.get('argv', [])
+            if not isinstance(argv, list) or not all(isinstance(argument, str) for argument in argv):
+                raise TypeError('argv must be a list of strings')
+            if 'source' in request:
+                source = request['source']
+            else:
+                with open(request['path'], mode='r', encoding='utf8') as file:
+                    source = file.read()
+            program, parse_failed, cached = self.programs.load(source)
+            if parse_failed:
+                status = batch.STATUS_SYNTAX_ERROR
+            dispatch_time = time.perf_counter() - received
+            with self.lock:
+                self.dispatch_times.append(dispatch_time)
+            if program is not None:
+                interpreter = Interpreter(settings.memo_size, output)
+                interpreter.globals.define_builtin('argv', new_list(list(argv)))
+                run_program(interpreter, program, settings.backend, settings.optimize, settings.inline_size,
+                            settings.max_stack)
+        except ReturnException:
+            status = batch.STATUS_ERROR
+            error = 'Error: Return statement outside of function'
+        except Exception as e:
+            status = batch.STATUS_ERROR
+            error = str(e)
+        finally:
+            thread_outputs.output = None
+        return {
+            'status': status,
+            'exit_code': 0 if status == batch.STATUS_OK else 1,
+            'output': output.getvalue(),
+            'error': error,
+            'cached': cached,
+            'elapsed': time.perf_counter() - received,
+        }
+
+    def work(self):
+        while True:
+            connection, request, received = self.requests.get()
+            with self.lock:
+                self.active += 1
+            response = self.execute(request, received)
+            try:
+                send_message(connection, response)
+            except OSError:
+                pass
+            finally:
+                connection.close()
+            with self.lock:
+                self.active -= 1
+                self.completed += 1
+                if response['exit_code'] != 0:
+                    self.failed += 1
+                self.latencies.append(time.perf_counter() - received)
+
+    def accept(self, connection):
+        if not self.readers.acquire(blocking=False):
+            self.reject(connection)
+            return
+        threading.Thread(target=self.read_request, args=(connection,), daemon=True).start()
+
+    def read_request(self, connection):
+        try:
+            self.dispatch(connection)
+        finally:
+            self.readers.release()
+
+    def dispatch(self, connection):
+        connection.settimeout(REQUEST_TIMEOUT)
+        try:
+            request = read_message(connection, MAX_REQUEST_SIZE)
+            if not isinstance(request, dict):
+                raise ValueError('Request must be a JSON object')
+        except (OSError, ValueError) as e:
+            self.reply_error(connection, batch.STATUS_ERROR, 1, f'Invalid request - {e}')
+            return
+        received = time.perf_counter()
+        connection.settimeout(None)
+
+        if request.get('command') == 'stats':
+            self.reply(connection, self.stats())
+            return
+        try:
+            self.requests.put_nowait((connection, request, received))
+        except queue.Full:
+            self.reject(connection)
+
+    def reject(self, connection):
+        with self.lock:
+            self.rejected += 1
+        self.reply_error(connection, STATUS_BUSY, EXIT_BUSY, 'Server busy - too many queued requests')
+
+    def reply(self, connection, message):
+        try:
+            send_message(connection, message)
+        except OSError:
+            pass
+        finally:
+            connection.close()
+
+    def reply_error(self, connection, status, code, error):
+        self.reply(connection, {'status': status, 'exit_code': code, 'output': '', 'error': error, 'cached': False})
+
+    def serve(self, socket_path):
+        signal.signal(signal.SIGTERM, stop_server)
+        sys.stdout = ThreadStream(sys.stdout)
+        thread_log_handler = ThreadLogHandler(list(log.handlers))
+        for handler in list(log.handlers):
+            log.removeHandler(handler)
+        log.addHandler(thread_log_handler)
+
+        for _ in range(self.workers):
+            threading.Thread(target=self.work, daemon=True).start()
+
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        listener.bind(socket_path)
+        listener.listen(socket.SOMAXCONN)
+        log.info(f'Daemon listening on {socket_path} with {self.workers} workers')
+        try:
+            while True:
+                connection, _ = listener.accept()
+                self.accept(connection)
+        finally:
+            listener.close()
+            os.remove(socket_path)
+
+
+# Klient: żądanie do serwera i odpowiedź jako słownik
+def request_daemon(socket_path, request):
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+        connection.connect(socket_path)
+        send_message(connection, request)
+        return read_message(connection)
+
+
+def run_client(socket_path, script, argv):
+    if script == '-':
+        request = {'source': sys.stdin.read(), 'argv': argv}
+    else:
+        request = {'path': os.path.abspath(script), 'argv': argv}
+    response = request_daemon(socket_path, request)
+    sys.stdout.write(response['output'])
+    if response['error'] is not None:
+        print(response['error'])
+    return response['exit_code']
+
+
+def print_stats(socket_path):
+    stats = request_daemon(socket_path, {'command': 'stats'})
+    for name, value in stats.items():
+        if isinstance(value, dict):
+            value = '  '.join(f'{key} {"-" if sample is None else f"{sample:.3f}"}' for key, sample in value.items())
+        print(f'{name:<14} {value}')
+    return 0
+
+
+def parse_arguments():
+    argument_parser = argparse.ArgumentParser(description='Atena interpreter daemon and its client')
+    commands = argument_parser.add_subparsers(dest='command', required=True)
+
+    serve_parser = commands.add_parser('serve', help='run the daemon')
+    serve_parser.add_argument('socket', help='path of the Unix socket to listen on')
+    serve_parser.add_argument('-w', '--workers', type=int, default=DEFAULT_WORKERS,
+                              help='number of programs executed at the same time')
+    serve_parser.add_argument('--max-queue', type=int, default=DEFAULT_MAX_QUEUE,
+                              help='number of requests waiting for a worker before new ones are rejected as busy')
+    serve_parser.add_argument('--cache-entries', type=int, default=DEFAULT_CACHE_ENTRIES,
+                              help='number of parsed programs kept in memory')
+    batch.add_execution_arguments(serve_parser)
+
+    run_parser = commands.add_parser('run', help='run a program in the daemon')
+    run_parser.add_argument('socket', help='path of the daemon socket')
+    run_parser.add_argument('script', help='program file, - reads the program from standard input')
+    run_parser.add_argument('argv', nargs=argparse.REMAINDER, help='arguments available to the program as argv')
+
+    stats_parser = commands.add_parser('stats', help='print daemon statistics')
+    stats_parser.add_argument('socket', help='path of the daemon socket')
+    return argument_parser.parse_args()
+
+
+if __name__ == '__main__':
+    arguments = parse_arguments()
+    if arguments.command == 'serve':
+        # Backend stack podnosi limit rekurencji całego procesu (stack_evaluator.recursion_limit);
+        # program backendu tree lub closure wykonywany w tym czasie w innym wątku mógłby przepełnić
+        # stos C zamiast zgłosić RecursionError, dlatego backend stack wymaga jednego wątku roboczego
+        if arguments.backend == 'stack' and arguments.workers > 1:
+            log.error('Error: The stack backend requires a single worker (--workers 1)')
+            sys.exit(1)
+        daemon = Daemon(arguments, max(1, arguments.workers), arguments.max_queue, arguments.cache_entries)
+        try:
+            daemon.serve(arguments.socket)
+        except KeyboardInterrupt:
+            pass
+    elif arguments.command == 'run':
+        sys.exit(run_client(arguments.socket, arguments.script, arguments.argv))
+    else:
+        sys.exit(print_stats(arguments.socket))
@@ -1,13 +1,55 @@
+import itertools
+
+from interpreter_logic.numeric_array import NumericArray, store_element
+
+# Numery wersji środowisk są unikalne globalnie, więc cache miejsca wywołania nie pomyli
+# środowisk dwóch różnych obiektów Interpreter wykonujących to samo drzewo
+environment_versions = itertools.count()
+
+
+# Przypisanie do elementu listy, wspólne dla wszystkich sposobów wykonania programu
+def assign_index(list_values, index, value):
+    try:
+        if index < 0 or index >= len(list_values):
+            raise IndexError('List index out of range')
+
+        if isinstance(list_values, NumericArray):
+            store_element(list_values, index, value)
+        else:
+            list_values[index] = value
+    except TypeError:
+        raise TypeError("Can't use subscript on a nonlist object")
+
+
 class Environment:
+    # Nazwy funkcji wbudowanych (define_builtin), które program może raz zadeklarować na nowo
+    builtin_names = frozenset()
+
     def __init__(self, enclosing=None):
         self.enclosing = enclosing
         self.variables = dict()
+        # Wersja zmienia się przy ponownym przypisaniu nazwy zapamiętanej w cache miejsca wywołania
+        # (watched_names); wywołania porównują ją z wersją, przy której zapamiętały funkcję
+        self.version = next(environment_versions)
+        self.watched_names = set()
 
     def define(self, name, value=None):
         if name in self.variables:
-            raise SyntaxError(f'Redeclaration of variable {name}')
+            if name not in self.builtin_names:
+                raise SyntaxError(f'Redeclaration of variable {name}')
+            self.builtin_names = self.builtin_names - {name}
+
+        self.variables[name] = value
+        if name in self.watched_names:
+            self.version = next(environment_versions)
 
+    def define_builtin(self, name, value):
         self.variables[name] = value
+        self.builtin_names = self.builtin_names | {name}
+
+    def watch(self, name):
+        self.watched_names.add(name)
+        return self.version
 
     def get(self, name):
         if name in self.variables:
@@ -22,16 +64,11 @@ class Environment:
     def assign(self, name, value, index=None):
         if name in self.variables.keys():
             if index is not None:
-                try:
-                    if index < 0 or index >= len(self.variables[name]):
-                        raise IndexError('List index out of range')
-
-                    self.variables[name][index] = value
-                except TypeError as e:
-                    print(e)
-                    raise TypeError("Can't use subscript on a nonlist object")
+                assign_index(self.variables[name], index, value)
             else:
                 self.variables[name] = value
+                if name in self.watched_names:
+                    self.version = next(environment_versions)
         else:
             # Jesteśmy w najwyższym bloku (globalnym)
             if self.enclosing is None:
@@ -39,3 +76,47 @@ class Environment:
             else:
                 self.enclosing.assign(name, value, index)
 
+
+# Środowisko bloku lub funkcji z wartościami w tablicy. Indeksy (sloty) są nadawane przez
+# resolver.Resolver, a scope (nazwa -> slot) jest współdzielony przez wszystkie wykonania
+# danego bloku. Zmienne są dodawane w kolejności deklaracji, więc zmienna jest widoczna
+# po nazwie dopiero po wykonaniu jej deklaracji - tak jak w Environment
+class Frame:
+    def __init__(self, enclosing, scope):
+        self.enclosing = enclosing
+        self.scope = scope
+        self.values = []
+
+    def define(self, name, value=None):
+        self.values.append(value)
+
+    def ancestor(self, depth):
+        environment = self
+        for _ in range(depth):
+            environment = environment.enclosing
+        return environment
+
+    def get_at(self, depth, slot):
+        if depth == 0:
+            return self.values[slot]
+        return self.ancestor(depth).values[slot]
+
+    def assign_at(self, depth, slot, value, index=None):
+        values = self.values if depth == 0 else self.ancestor(depth).values
+        if index is not None:
+            assign_index(values[slot], index, value)
+        else:
+            values[slot] = value
+
+    def get(self, name):
+        slot = self.scope.get(name)
+        if slot is not None and slot < len(self.values):
+            return self.values[slot]
+        return self.enclosing.get(name)
+
+    def assign(self, name, value, index=None):
+        slot = self.scope.get(name)
+        if slot is not None and slot < len(self.values):
+            self.assign_at(0, slot, value, index)
+        else:
+            self.enclosing.assign(name, value, index)
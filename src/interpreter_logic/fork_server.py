@@ -0,0 +1,138 @@
+import argparse
+import importlib
+import json
+import os
+import signal
+import socket
+import sys
+
+from interpreter_logic import batch
+from interpreter_logic.interpreter import Interpreter
+from logging_config import log
+
+# Serwer wykonujący programy w procesach potomnych. Proces nadrzędny raz importuje cały
+# interpreter (tablice parsera, backendy, biblioteka standardowa), a dla każdego żądania
+# wykonuje os.fork() - potomek dziedziczy gotowe struktury (kopiowane dopiero przy zapisie),
+# wykonuje program tak jak batch.run_script i kończy się po wysłaniu odpowiedzi.
+#
+# Protokół (gniazdo Unix, jedno żądanie na połączenie, wiadomości JSON zakończone '\n'):
+#   żądanie:    {"path": "/abs/path/program.at"}
+#   odpowiedź:  {"path": ..., "status": "ok" | "syntax error" | "error", "exit_code": 0 | 1,
+#                "output": ..., "error": ... | null, "elapsed": sekundy}
+MAX_REQUEST_SIZE = 64 * 1024
+
+
+def parse_arguments():
+    argument_parser = argparse.ArgumentParser(description='Run Atena programs in processes forked from a warm server')
+    argument_parser.add_argument('socket', help='path of the Unix socket to listen on')
+    batch.add_execution_arguments(argument_parser)
+    batch.add_cache_arguments(argument_parser)
+    return argument_parser.parse_args()
+
+
+# Import modułów ładowanych leniwie i jednorazowe utworzenie Interpretera (biblioteka standardowa),
+# aby potomkowie nie powtarzali tej pracy
+def warm_up():
+    for module_name in ('bytecode', 'closure_compiler', 'inliner', 'purity', 'vm'):
+        importlib.import_module(f'interpreter_logic.{module_name}')
+    Interpreter()
+
+
+# Wiadomość kończy znak nowej linii (json.dumps nie wstawia go do tekstu). max_size ogranicza
+# rozmiar żądań przyjmowanych przez serwer; odpowiedzi z wyjściem programu nie mają limitu
+def read_message(connection, max_size=None):
+    chunks = []
+    size = 0
+    while not chunks or not chunks[-1].endswith(b'\n'):
+        chunk = connection.recv(65536)
+        if not chunk:
+            break
+        chunks.append(chunk)
+        size += len(chunk)
+        if max_size is not None and size > max_size:
+            raise ValueError('Request too large')
+    return json.loads(b''.join(chunks).decode('utf8'))
+
+
+def send_message(connection, message):
+    connection.sendall(json.dumps(message).encode('utf8') + b'\n')
+
+
+def exit_code(status):
+    return 0 if status == batch.STATUS_OK else 1
+
+
+def result_message(result):
+    return {
+        'path': result.path,
+        'status': result.status,
+        'exit_code': exit_code(result.status),
+        'output': result.output,
+        'error': result.error,
+        'elapsed': result.elapsed,
+    }
+
+
+# Potomek: obsługa jednego żądania. os._exit pomija sprzątanie odziedziczone po procesie
+# nadrzędnym (zamknięcie i usunięcie gniazda nasłuchującego)
+def serve_child(connection, settings):
+    code = 1
+    try:
+        batch.init_worker(settings)
+        request = read_message(connection, MAX_REQUEST_SIZE)
+        result = batch.run_script(request['path'])
+        send_message(connection, result_message(result))
+        code = exit_code(result.status)
+    except Exception as e:
+        try:
+            send_message(connection, {'status': batch.STATUS_ERROR, 'exit_code': 1, 'output': '', 'error': str(e)})
+        except OSError:
+            pass
+    finally:
+        connection.close()
+        os._exit(code)
+
+
+def stop_server(_signal_number, _frame):
+    raise KeyboardInterrupt
+
+
+def serve(socket_path, settings):
+    warm_up()
+    # Zakończeni potomkowie są usuwani przez system - serwer nie czeka na ich kod wyjścia
+    signal.signal(signal.SIGCHLD, signal.SIG_IGN)
+    # SIGTERM kończy serwer tak jak Ctrl-C, z usunięciem pliku gniazda
+    signal.signal(signal.SIGTERM, stop_server)
+    if os.path.exists(socket_path):
+        os.remove(socket_path)
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(socket_path)
+    listener.listen(socket.SOMAXCONN)
+    log.info(f'Fork server listening on {socket_path}')
+    try:
+        while True:
+            connection, _ = listener.accept()
+            if os.fork() == 0:
+                signal.signal(signal.SIGTERM, signal.SIG_DFL)
+                listener.close()
+                serve_child(connection, settings)
+            connection.close()
+    finally:
+        listener.close()
+        os.remove(socket_path)
+
+
+# Klient: wykonanie programu przez serwer, wynik jako słownik odpowiedzi
+def run_remote(socket_path, script_path):
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+        connection.connect(socket_path)
+        send_message(connection, {'path': os.path.abspath(script_path)})
+        return read_message(connection)
+
+
+if __name__ == '__main__':
+    arguments = parse_arguments()
+    try:
+        serve(arguments.socket, arguments)
+    except KeyboardInterrupt:
+        sys.exit(0)
@@ -1,24 +1,52 @@
-from interpreter_logic.environment import Environment
+from interpreter_logic.environment import Frame
 
 
-# Wyjątek używany do zwracania danych z funkcji
+# Sygnał zakończenia instrukcji przez return, zwracany przez Interpreter.execute.
+# tail_arguments różne od None oznacza wywołanie ogonowe funkcji samej siebie ('return f(...)'):
+# Function.execute wykonuje wtedy ciało ponownie z nowymi argumentami zamiast zagłębiać się w rekurencję
+class ReturnValue:
+    __slots__ = ('value', 'tail_arguments')
+
+    def __init__(self, value, tail_arguments=None):
+        self.value = value
+        self.tail_arguments = tail_arguments
+
+
+# Wyjątek zgłaszany, gdy return wystąpi poza funkcją. Alternatywne sposoby wykonania
+# (domknięcia, maszyna wirtualna) używają go również do zwracania danych z funkcji
 class ReturnException(Exception):
     def __init__(self, value):
         super().__init__()
         self.value = value
 
 
+# Odpowiednik ReturnValue.tail_arguments dla funkcji skompilowanych do domknięć
+class TailCallException(Exception):
+    def __init__(self, arguments):
+        super().__init__()
+        self.arguments = arguments
+
+
 class Function:
     def __init__(self, declaration):
         self.declaration = declaration
         self.arity = len(declaration.params)
 
     def call(self, interpreter, arguments):
-        function_environment = Environment(interpreter.globals)
-        for param, argument in zip(self.declaration.params, arguments):
-            function_environment.define(param, argument)
-
-        try:
-            interpreter.execute_block(self.declaration.body, function_environment)
-        except ReturnException as function_return:
-            return function_return.value
+        if self.declaration.memoized:
+            return interpreter.memo_cache(self.declaration).call(
+                lambda cached_arguments: self.execute(interpreter, cached_arguments), arguments)
+        return self.execute(interpreter, arguments)
+
+    def execute(self, interpreter, arguments):
+        while True:
+            function_environment = Frame(interpreter.globals, self.declaration.scope)
+            for param, argument in zip(self.declaration.params, arguments):
+                function_environment.define(param, argument)
+
+            completion = interpreter.execute_block(self.declaration.body, function_environment)
+            if completion is None:
+                return None
+            if completion.tail_arguments is None:
+                return completion.value
+            arguments = completion.tail_arguments
@@ -1,8 +1,14 @@
+from interpreter_logic.native import native_function
 
-class Print:
-    def __init__(self):
-        self.arity = None
 
-    def call(self, _interpreter, arguments):
-        for argument in arguments:
-            print(argument)
+# Funkcja print wypisująca argumenty, każdy w osobnej linii, do wyjścia programu
+# (output.BufferedOutput, output.MemoryOutput) danego Interpretera
+def print_function(output):
+    write = output.write
+
+    @native_function('print')
+    def print_values(*values):
+        for value in values:
+            write(f'{value}\n')
+
+    return print_values
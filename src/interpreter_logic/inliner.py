@@ -0,0 +1,228 @@
+import itertools
+
+from interpreter_logic import ast_expression_nodes as expr_node
+from interpreter_logic import ast_statement_nodes as stmt_node
+from interpreter_logic.optimizer import DEFAULT_INLINE_THRESHOLD, walk
+
+NAMED_NODES = (expr_node.AstExprVariable, expr_node.AstAssignment, expr_node.AstListAssignment,
+               expr_node.AstSubscript, expr_node.AstCall, stmt_node.AstStmtVariable)
+
+
+# Kopia poddrzewa; szybsza od copy.deepcopy, bo węzły mają wyłącznie proste atrybuty
+def clone(node):
+    copied = object.__new__(type(node))
+    for name, value in vars(node).items():
+        if type(value) is list:
+            value = [clone(item) if hasattr(item, 'accept') else item for item in value]
+        elif hasattr(value, 'accept'):
+            value = clone(value)
+        setattr(copied, name, value)
+    return copied
+
+
+def walk_all(nodes):
+    for root in nodes:
+        yield from walk(root)
+
+
+def contains_return(nodes):
+    return any(isinstance(node, stmt_node.AstReturn) for node in walk_all(nodes))
+
+
+def unwrap_statement(statement):
+    if isinstance(statement, stmt_node.AstStatement):
+        return statement.expression
+    return statement
+
+
+# Wstawia ciała małych, nierekurencyjnych funkcji w miejsca wywołań. Działa przed resolverem,
+# więc wynik jest zwykłym drzewem obsługiwanym przez wszystkie backendy.
+#  - Wywołanie będące całą instrukcją ('f(a, b);') zastępuje blok, w którym parametry są
+#    zmiennymi zainicjalizowanymi argumentami, a po nich następuje ciało funkcji. Ciało nie może
+#    zawierać return poza ostatnią instrukcją (jej wartość jest tylko obliczana).
+#  - Wywołanie w wyrażeniu jest zastępowane wyrażeniem z 'return wyrażenie;', jeżeli argumentami
+#    są literały lub zmienne, a wyrażenie nie zawiera wywołań ani przypisań - podstawienie
+#    nie zmienia wtedy kolejności ani liczby efektów ubocznych.
+# Parametry dostają nowe nazwy (niemożliwe do zapisania w programie), a nazwy globalne użyte
+# w ciele nie mogą być przesłonięte przez zmienne lokalne otaczające miejsce wywołania.
+# Funkcja musi być zadeklarowana na najwyższym poziomie przed instrukcją z wywołaniem
+# i nigdzie nie może być przypisana ani przesłonięta
+class Inliner:
+    def __init__(self, program, threshold=DEFAULT_INLINE_THRESHOLD):
+        self.program = program
+        self.threshold = threshold
+        self.renames = itertools.count(1)
+        # Nazwa funkcji -> (pozycja deklaracji w programie, deklaracja)
+        self.candidates = {}
+        # Nazwy zmiennych lokalnych zadeklarowanych w każdej instrukcji najwyższego poziomu
+        self.statement_locals = []
+        # Nazwy globalne użyte w ciele funkcji i informacja, czy ciało ma return tylko na końcu
+        self.body_names = {}
+        self.single_exit = {}
+        self.inlined_calls = 0
+        # Funkcje, które można wstawić w bieżącej instrukcji najwyższego poziomu,
+        # oraz nazwy zmiennych lokalnych, które mogłyby przesłonić nazwy globalne z ich ciał
+        self.available = {}
+        self.caller_locals = set()
+
+    def inline(self):
+        self.candidates = self.collect_candidates()
+        for position, statement in enumerate(self.program.statements):
+            self.available = {name: declaration for name, (index, declaration) in self.candidates.items()
+                              if index < position}
+            if not self.available:
+                continue
+            self.caller_locals = self.statement_locals[position]
+            self.program.statements[position] = self.rewrite_node(statement)
+        return self.program
+
+    def collect_candidates(self):
+        declarations = {}
+        calls = {}
+        sizes = {}
+        excluded = set()
+        # Nazwy, które mogą wskazywać na coś innego niż zadeklarowaną funkcję
+        rebound_names = set()
+
+        for position, statement in enumerate(self.program.statements):
+            nodes = list(walk(statement))
+            local_names = set()
+            for node in nodes[1:]:
+                if isinstance(node, (stmt_node.AstStmtVariable, stmt_node.AstFunctionDeclaration)):
+                    local_names.add(node.name)
+                if isinstance(node, stmt_node.AstFunctionDeclaration):
+                    local_names.update(node.params)
+                elif isinstance(node, (expr_node.AstAssignment, expr_node.AstListAssignment)):
+                    rebound_names.add(node.name)
+            rebound_names |= local_names
+
+            if not isinstance(statement, stmt_node.AstFunctionDeclaration):
+                self.statement_locals.append(local_names)
+                continue
+
+            name = statement.name
+            params = set(statement.params)
+            self.statement_locals.append(local_names | params)
+            declarations[name] = (position, statement)
+            calls[name] = {node.name for node in nodes if isinstance(node, expr_node.AstCall)}
+            sizes[name] = len(nodes) - 1
+            self.body_names[name] = {node.name for node in nodes if isinstance(node, NAMED_NODES)} - params
+            # Redeklaracja parametru jest błędem, który musi wystąpić w czasie wykonania
+            if local_names & params or any(isinstance(node, stmt_node.AstFunctionDeclaration) for node in nodes[1:]):
+                excluded.add(name)
+
+            # Jedyny return, jaki można zastąpić bez skoków, to ostatnia instrukcja ciała
+            body = statement.body
+            if body and isinstance(unwrap_statement(body[-1]), stmt_node.AstReturn):
+                self.single_exit[name] = not contains_return(body[:-1])
+            else:
+                self.single_exit[name] = not contains_return(body)
+
+        candidates = {}
+        for name, (position, declaration) in declarations.items():
+            if (name in excluded or name in rebound_names or declaration.memoized or sizes[name] > self.threshold
+                    or self.reaches(name, name, calls, set())):
+                continue
+            candidates[name] = (position, declaration)
+        return candidates
+
+    def reaches(self, start, target, calls, visited):
+        for callee in calls.get(start, ()):
+            if callee == target:
+                return True
+            if callee not in visited:
+                visited.add(callee)
+                if self.reaches(callee, target, calls, visited):
+                    return True
+        return False
+
+    def rewrite(self, node):
+        for name, value in vars(node).items():
+            if isinstance(value, list):
+                setattr(node, name, [self.rewrite_node(item) for item in value])
+            else:
+                setattr(node, name, self.rewrite_node(value))
+        return node
+
+    def rewrite_node(self, value):
+        if not hasattr(value, 'accept'):
+            return value
+        value = self.rewrite(value)
+        if isinstance(value, stmt_node.AstStatement) and isinstance(value.expression, expr_node.AstCall):
+            return self.inline_statement(value) or value
+        if isinstance(value, expr_node.AstCall):
+            return self.inline_expression(value) or value
+        return value
+
+    def callee(self, call):
+        declaration = self.available.get(call.name)
+        if declaration is None or len(call.arguments) != len(declaration.params):
+            return None
+        if not self.body_names[call.name].isdisjoint(self.caller_locals):
+            return None
+        return declaration
+
+    def renamed_body(self, declaration):
+        body = [clone(statement) for statement in declaration.body]
+        new_names = {param: f'{param}${next(self.renames)}' for param in declaration.params}
+        for node in walk_all(body):
+            if isinstance(node, NAMED_NODES) and node.name in new_names:
+                node.name = new_names[node.name]
+        return body, new_names
+
+    def inline_statement(self, statement):
+        call = statement.expression
+        declaration = self.callee(call)
+        if declaration is None or not self.single_exit[call.name]:
+            return None
+
+        body, new_names = self.renamed_body(declaration)
+        if body and isinstance(unwrap_statement(body[-1]), stmt_node.AstReturn):
+            returned_value = unwrap_statement(body[-1]).value
+            body = body[:-1] + ([stmt_node.AstStatement(returned_value)] if returned_value is not None else [])
+
+        parameters = [stmt_node.AstStmtVariable(new_names[param], argument)
+                      for param, argument in zip(declaration.params, call.arguments)]
+        self.inlined_calls += 1
+        return stmt_node.AstBlock(parameters + body)
+
+    def inline_expression(self, call):
+        declaration = self.callee(call)
+        if declaration is None or len(declaration.body) != 1:
+            return None
+        returned = unwrap_statement(declaration.body[0])
+        if not isinstance(returned, stmt_node.AstReturn) or returned.value is None:
+            return None
+        if any(isinstance(node, (expr_node.AstCall, expr_node.AstAssignment, expr_node.AstListAssignment))
+               for node in walk(returned.value)):
+            return None
+        if not all(isinstance(argument, (expr_node.AstLiteral, expr_node.AstExprVariable))
+                   for argument in call.arguments):
+            return None
+
+        arguments = dict(zip(declaration.params, call.arguments))
+        # Parametr użyty jako nazwa listy (p[i]) można zastąpić tylko inną zmienną
+        for node in walk(returned.value):
+            if (isinstance(node, expr_node.AstSubscript) and node.name in arguments
+                    and not isinstance(arguments[node.name], expr_node.AstExprVariable)):
+                return None
+
+        self.inlined_calls += 1
+        return self.substitute(clone(returned.value), arguments)
+
+    def substitute(self, node, arguments):
+        if isinstance(node, expr_node.AstExprVariable) and node.name in arguments:
+            return clone(arguments[node.name])
+        if isinstance(node, expr_node.AstSubscript) and node.name in arguments:
+            node.name = arguments[node.name].name
+        for name, value in vars(node).items():
+            if isinstance(value, list):
+                setattr(node, name, [self.substitute(item, arguments) if hasattr(item, 'accept') else item
+                                     for item in value])
+            elif hasattr(value, 'accept'):
+                setattr(node, name, self.substitute(value, arguments))
+        return node
+
+
+def inline_functions(program, threshold=DEFAULT_INLINE_THRESHOLD):
+    return Inliner(program, threshold).inline()
@@ -1,8 +1,13 @@
 import globals
 
-from interpreter_logic.environment import Environment
-from interpreter_logic.function import Function, ReturnException
-from interpreter_logic.parser import parse
+from interpreter_logic.environment import Environment, Frame
+from interpreter_logic.function import Function, ReturnException, ReturnValue
+from interpreter_logic.memo_cache import DEFAULT_MEMO_CACHE_SIZE, MemoCache
+from interpreter_logic.native import call_direct, direct_implementation
+from interpreter_logic.numeric_array import LIST_TYPES, NumericArray, new_list
+from interpreter_logic.output import BufferedOutput
+from interpreter_logic.quickening import Quickening
+from interpreter_logic.resolver import Resolver
 from logging_config import log
 
 TYPE_NAMES = {
@@ -13,9 +18,14 @@ TYPE_NAMES = {
     list: 'list',
     None: 'none'
 }
+# Listy przechowywane w tablicach liczb (numeric_array.py)
+TYPE_NAMES.update((list_type, 'list') for list_type in LIST_TYPES)
 
 MAX_ARGUMENTS_NUM = 255
 
+# Liczba kroków wykonywanych przez interpret_async między oddaniem sterowania pętli zdarzeń asyncio
+DEFAULT_STEP_BUDGET = 10_000
+
 
 class Interpreter:
     TYPES_ADDITION = [int, float, bool, str]
@@ -26,20 +36,70 @@ class Interpreter:
     TYPES_COMPARISON = TYPES_SUBTRACTION
     TYPES_NOT = TYPES_SUBTRACTION
 
-    def __init__(self):
+    def __init__(self, memo_cache_size=DEFAULT_MEMO_CACHE_SIZE, output=None):
+        # Wyjście programu (funkcja print) - domyślnie sys.stdout zapisywane po każdej linii
+        self.output = BufferedOutput() if output is None else output
         self.globals = Environment()
-        self.globals.define('print', globals.Print())
+        self.globals.define('print', globals.print_function(self.output))
+        # Biblioteka standardowa importuje Interpreter (TYPE_NAMES, TYPES_COMPARISON)
+        from interpreter_logic.stdlib import define_builtins
+        define_builtins(self.globals)
         self.environment = self.globals
+        # Cache wyników funkcji 'memo fun' - jeden na deklarację, wspólny dla wszystkich backendów
+        self.memo_cache_size = memo_cache_size
+        self.memo_caches = {}
+        # Wyniki wywołań AstHoistedCall - funkcji czystych z argumentami stałymi
+        self.hoisted_values = {}
+        self.tail_calls = []
+        self.quickening = Quickening()
 
     def interpret(self, interpreter_input, debug=False):
+        # Import jest leniwy, aby wykonanie programu wczytanego z cache nie wymagało budowy parsera
+        from interpreter_logic.parser import parse
+
+        parsed_input = parse(interpreter_input, debug)
+        try:
+            self.execute(self.resolve(parsed_input))
+        finally:
+            self.output.flush()
+
+    # Wykonanie w pętli zdarzeń asyncio: co step_budget kroków (węzłów, iteracji pętli) program
+    # oddaje sterowanie innym zadaniom i może zostać anulowany. Wykonuje go nierekurencyjny
+    # StackEvaluator, bo drzewiasty Interpreter nie może przerwać obliczeń w dowolnym węźle.
+    # step_budget = None - program jest wykonywany bez przerw, tak jak przez interpret
+    async def interpret_async(self, interpreter_input, step_budget=DEFAULT_STEP_BUDGET, debug=False):
+        from interpreter_logic.parser import parse
+        from interpreter_logic.stack_evaluator import StackEvaluator
+
         parsed_input = parse(interpreter_input, debug)
-        self.execute(parsed_input)
+        try:
+            if step_budget is None:
+                self.execute(self.resolve(parsed_input))
+            else:
+                await StackEvaluator(self).execute_async(self.resolve(parsed_input), step_budget)
+        finally:
+            self.output.flush()
+
+    def memo_cache(self, declaration):
+        cache = self.memo_caches.get(declaration)
+        if cache is None:
+            cache = self.memo_caches[declaration] = MemoCache(declaration.name, self.memo_cache_size)
+        return cache
+
+    def resolve(self, program):
+        resolver = Resolver(self.globals.variables.keys())
+        program = resolver.resolve_program(program)
+        # Nazwy funkcji z wywołaniami ogonowymi wykonywanymi bez zagłębiania rekurencji (opcja --tail-calls)
+        self.tail_calls = resolver.tail_calls
+        return program
 
     def evaluate(self, expression):
         return expression.accept(self)
 
+    # Instrukcja zwraca None lub ReturnValue, jeżeli wykonano w niej return.
+    # Sygnał jest przekazywany w górę aż do Function.call, bez użycia wyjątków
     def execute(self, statement):
-        statement.accept(self)
+        return statement.accept(self)
 
     def execute_block(self, statements, new_environment):
         previous_environment = self.environment
@@ -48,11 +108,19 @@ class Interpreter:
         try:
             self.environment = new_environment
             for statement in statements:
-                self.execute(statement)
+                completion = self.execute(statement)
+                if completion is not None:
+                    return completion
         finally:
             self.environment = previous_environment
 
     def are_equal(self, fist_value, second_value):
+        # Lista przechowywana w tablicy liczb jest porównywana jak zwykła lista
+        if isinstance(fist_value, NumericArray):
+            fist_value = list(fist_value)
+        if isinstance(second_value, NumericArray):
+            second_value = list(second_value)
+
         if type(fist_value) is not type(second_value):
             return False
         else:
@@ -75,15 +143,26 @@ class Interpreter:
         return expression.value
 
     def visit_list(self, list_expression):
-        return [self.evaluate(elem) for elem in list_expression.values]
+        return new_list([self.evaluate(elem) for elem in list_expression.values])
 
     def visit_grouping(self, expression):
         return self.evaluate(expression.inside_expression)
 
     def visit_unary(self, expression):
         value = self.evaluate(expression.right)
+        # Węzeł wyspecjalizowany (quickening.py) wykonuje operację po sprawdzeniu samego typu argumentu
+        specialization = self.quickening.specialized.get(expression)
+        if specialization is not None:
+            value_type, operation = specialization
+            if type(value) is value_type:
+                return operation(value)
+            self.quickening.deoptimize(expression)
+        elif expression not in self.quickening.deoptimized:
+            self.quickening.specialize_unary(expression, type(value))
+        return self.unary_operation(expression.operator, value)
+
+    def unary_operation(self, operator, value):
         value_type = type(value)
-        operator = expression.operator
 
         if operator == '-':
             if value_type not in self.TYPES_UNARY_MINUS:
@@ -97,9 +176,20 @@ class Interpreter:
     def visit_binary(self, expression):
         left_side_value = self.evaluate(expression.left)
         right_side_value = self.evaluate(expression.right)
+        specialization = self.quickening.specialized.get(expression)
+        if specialization is not None:
+            left_type, right_type, operation = specialization
+            if type(left_side_value) is left_type and type(right_side_value) is right_type:
+                return operation(left_side_value, right_side_value)
+            self.quickening.deoptimize(expression)
+        # Specjalizacja następuje przed sprawdzeniem typów, ale tabele zawierają tylko typy dozwolone
+        elif expression not in self.quickening.deoptimized:
+            self.quickening.specialize_binary(expression, type(left_side_value), type(right_side_value))
+        return self.binary_operation(expression.operator, left_side_value, right_side_value)
+
+    def binary_operation(self, operator, left_side_value, right_side_value):
         left_side_type = type(left_side_value)
         right_side_type = type(right_side_value)
-        operator = expression.operator
 
         if operator == '-':
             # TODO - MODULO, INTEGER DIVISION
@@ -154,10 +244,15 @@ class Interpreter:
 
     def visit_program(self, program):
         for statement in program.statements:
-            self.execute(statement)
+            completion = self.execute(statement)
+            if completion is not None:
+                raise ReturnException(completion.value)
 
     def visit_statement(self, statement):
-        self.evaluate(statement.expression)
+        # AstStatement opakowuje zarówno wyrażenia, jak i instrukcje (if, while, return)
+        result = self.evaluate(statement.expression)
+        if type(result) is ReturnValue:
+            return result
 
     def visit_stmt_variable(self, statement):
         if statement.initializer is None:
@@ -166,40 +261,102 @@ class Interpreter:
             value = self.evaluate(statement.initializer)
             self.environment.define(statement.name, value)
 
+    # Zmienne lokalne mają (depth, slot) nadane przez resolver, globalne (slot = None) są odczytywane po nazwie
     def visit_expr_variable(self, variable):
-        return self.environment.get(variable.name)
+        if variable.slot is None:
+            return self.globals.get(variable.name)
+        return self.environment.get_at(variable.depth, variable.slot)
 
     def visit_assignment(self, expression):
         value = self.evaluate(expression.value)
-        self.environment.assign(expression.name, value)
+        if expression.slot is None:
+            self.globals.assign(expression.name, value)
+        else:
+            self.environment.assign_at(expression.depth, expression.slot, value)
         return value
 
     def visit_list_assignment(self, expression):
         value = self.evaluate(expression.value)
         index = self.evaluate(expression.index)
-        self.environment.assign(expression.name, value, index)
+        if expression.slot is None:
+            self.globals.assign(expression.name, value, index)
+        else:
+            self.environment.assign_at(expression.depth, expression.slot, value, index)
         return value
 
     def visit_block(self, block):
-        self.execute_block(block.statements, Environment(self.environment))
+        # Blok bez deklaracji (scope = None) nie potrzebuje własnego środowiska
+        if block.scope is None:
+            for statement in block.statements:
+                completion = self.execute(statement)
+                if completion is not None:
+                    return completion
+            return None
+
+        return self.execute_block(block.statements, Frame(self.environment, block.scope))
 
     def visit_if(self, if_statement):
         if self.evaluate(if_statement.condition):
-            self.execute(if_statement.then_branch)
+            return self.execute(if_statement.then_branch)
         else:
             if if_statement.else_branch is not None:
-                self.execute(if_statement.else_branch)
+                return self.execute(if_statement.else_branch)
 
     def visit_while(self, while_statement):
         while self.evaluate(while_statement.condition):
-            self.execute(while_statement.body)
+            completion = self.execute(while_statement.body)
+            if completion is not None:
+                return completion
+
+    # Pętla rozpoznana przez CountedLoopSpecializer. Licznik jest zapisywany bezpośrednio w tablicy
+    # wartości ramki; po zakończeniu ma taką samą wartość, jaką zostawiłaby pętla while
+    def visit_counted_loop(self, loop):
+        values = self.environment.ancestor(loop.depth).values
+        start = values[loop.slot]
+        bound = self.evaluate(loop.bound)
+        if type(start) is not int or type(bound) is not int:
+            return self.execute(loop.fallback)
+
+        if loop.operator == '<=':
+            bound += 1
+        slot = loop.slot
+        statements = loop.body.statements
+        for counter in range(start, bound):
+            values[slot] = counter
+            for statement in statements:
+                completion = self.execute(statement)
+                if completion is not None:
+                    return completion
+        values[slot] = max(start, bound)
 
     def visit_function_declaration(self, declaration):
         function_object = Function(declaration)
         self.environment.define(declaration.name, function_object)
 
+    def visit_hoisted_call(self, expression):
+        try:
+            return self.hoisted_values[expression]
+        except KeyError:
+            value = self.evaluate(expression.call)
+            if type(value) not in LIST_TYPES:
+                self.hoisted_values[expression] = value
+            return value
+
+    # Funkcja globalna sprawdzona już w danym miejscu wywołania jest zapamiętywana w węźle razem
+    # z wersją środowiska globalnego. Dopóki nazwa nie zostanie ponownie przypisana, wywołanie
+    # pomija wyszukiwanie po nazwie i sprawdzenie liczby argumentów (stałej dla miejsca wywołania).
+    # Funkcja wbudowana z co najwyżej trzema argumentami dostaje je wtedy bezpośrednio (call_direct)
     def visit_call(self, call_expression):
-        function_object = self.environment.get(call_expression.name)
+        if call_expression.cached_version == self.globals.version:
+            if call_expression.cached_implementation is not None:
+                return call_direct(call_expression.cached_implementation, self.evaluate, call_expression.arguments)
+            arguments = [self.evaluate(argument) for argument in call_expression.arguments]
+            return call_expression.cached_function.call(self, arguments)
+
+        if call_expression.slot is None:
+            function_object = self.globals.get(call_expression.name)
+        else:
+            function_object = self.environment.get_at(call_expression.depth, call_expression.slot)
         arguments = [self.evaluate(argument) for argument in call_expression.arguments]
         try:
             # Arity = None - funkcja przyjmuje zmienną liczbę argumentów
@@ -208,6 +365,10 @@ class Interpreter:
                 raise RuntimeError(f'Call with {len(arguments)} arguments to a function "{call_expression.name}" '
                                    f'with arity {function_object.arity}')
 
+            if call_expression.slot is None:
+                call_expression.cached_function = function_object
+                call_expression.cached_implementation = direct_implementation(function_object, len(arguments))
+                call_expression.cached_version = self.globals.watch(call_expression.name)
             return function_object.call(self, arguments)
         except NotImplementedError:
             log.error('Error: Called object not callable')
@@ -217,7 +378,10 @@ class Interpreter:
         try:
             index = self.evaluate(subscript_expression.index)
             index = int(index)
-            list_values = self.environment.get(subscript_expression.name)
+            if subscript_expression.slot is None:
+                list_values = self.globals.get(subscript_expression.name)
+            else:
+                list_values = self.environment.get_at(subscript_expression.depth, subscript_expression.slot)
             if index < 0 or index >= len(list_values):
                 log.error('Error: Index error while interpreting subscript')
                 raise IndexError(f"List index out of range")
@@ -230,10 +394,18 @@ class Interpreter:
             raise e
 
     def visit_return(self, return_statement):
+        if return_statement.tail_call:
+            # Liczba argumentów została sprawdzona przez resolver
+            call = return_statement.value
+            function_object = self.globals.get(call.name)
+            if (type(function_object) is Function
+                    and function_object.declaration.function_id == return_statement.function_id):
+                return ReturnValue(None, [self.evaluate(argument) for argument in call.arguments])
+
         if return_statement.value is not None:
             return_value = self.evaluate(return_statement.value)
         else:
             return_value = None
 
-        raise ReturnException(return_value)
+        return ReturnValue(return_value)
 
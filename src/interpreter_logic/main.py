@@ -1,26 +1,148 @@
+import argparse
 import sys
+from collections import Counter
 
+from interpreter_logic.ast_cache import AstCache, DEFAULT_MAX_ENTRIES
 from interpreter_logic.interpreter import Interpreter, ReturnException
+from interpreter_logic.memo_cache import DEFAULT_MEMO_CACHE_SIZE
+from interpreter_logic.optimizer import DEFAULT_INLINE_THRESHOLD, OPTIMIZATION_LEVELS, optimize, optimize_resolved
+from interpreter_logic.output import BufferedOutput, DEFAULT_BUFFER_SIZE, FLUSH_POLICIES
+from interpreter_logic.stack_evaluator import DEFAULT_MAX_STACK_SIZE, StackEvaluator, recursion_limit
+from logging_config import log
 
-if __name__ == '__main__':
-    if len(sys.argv) < 2:
-        print("Path to file not given")
+BACKENDS = ['tree', 'closure', 'vm', 'stack']
+
+
+def parse_arguments():
+    argument_parser = argparse.ArgumentParser(description='Atena language interpreter')
+    argument_parser.add_argument('path', help='path to the program file')
+    argument_parser.add_argument('-d', '--debug', action='store_true', help='print parser debug information')
+    argument_parser.add_argument('-b', '--backend', choices=BACKENDS, default='tree',
+                                 help='execution engine: tree-walking interpreter, AST compiled to closures, '
+                                      'bytecode virtual machine or non-recursive evaluator with an explicit stack')
+    argument_parser.add_argument('--max-stack', type=int, default=DEFAULT_MAX_STACK_SIZE,
+                                 help='maximum number of pending tasks of the stack backend, which bounds the depth '
+                                      'of expressions and recursion')
+    argument_parser.add_argument('-O', '--optimize', type=int, choices=OPTIMIZATION_LEVELS, default=0,
+                                 help='optimization level: 0 - none, 1 - constant folding and native counted loops, '
+                                      '2 - also remove dead if/while branches and cache results of pure functions')
+    argument_parser.add_argument('--inline-size', type=int, default=DEFAULT_INLINE_THRESHOLD,
+                                 help='largest function body (in AST nodes) inlined at call sites with -O 2, '
+                                      '0 disables inlining')
+    argument_parser.add_argument('--flush', choices=FLUSH_POLICIES, default=None,
+                                 help='when buffered program output is written: after every line, after '
+                                      '--output-buffer characters or when the program ends (default: newline for '
+                                      'a terminal, size otherwise)')
+    argument_parser.add_argument('--output-buffer', type=int, default=DEFAULT_BUFFER_SIZE,
+                                 help='number of buffered output characters written at once with --flush size')
+    argument_parser.add_argument('--no-cache', action='store_true', help='do not use the parsed program cache')
+    argument_parser.add_argument('--cache-dir', default=None, help='directory for the parsed program (.atc) cache')
+    argument_parser.add_argument('--cache-size', type=int, default=DEFAULT_MAX_ENTRIES,
+                                 help='maximum number of cached programs')
+    argument_parser.add_argument('--memo-size', type=int, default=DEFAULT_MEMO_CACHE_SIZE,
+                                 help='maximum number of results remembered for each "memo fun" function')
+    argument_parser.add_argument('--memo-stats', action='store_true',
+                                 help='print cache hits and misses of "memo fun" functions after the program ends')
+    argument_parser.add_argument('--tail-calls', action='store_true',
+                                 help='report self-recursive "return f(...)" calls executed without growing the stack')
+    argument_parser.add_argument('--quickening-stats', action='store_true',
+                                 help='print how many operator nodes were specialized for their operand types '
+                                      'and deoptimized by the tree interpreter')
+    argument_parser.add_argument('--purity', action='store_true',
+                                 help='print which functions are pure (used by -O 2) instead of running the program')
+    return argument_parser.parse_args()
+
+
+def load_program(source, debug, cache):
+    # W trybie debug zawsze uruchamiamy parser, żeby wypisać jego przebieg
+    if cache is not None and not debug:
+        program = cache.load(source)
+        if program is not None:
+            return program
+
+    # Tokenizer i parser są importowane dopiero gdy programu nie ma w cache
+    from interpreter_logic import parser
+
+    program = parser.parse(source, debug)
+    if cache is not None and program is not None and not parser.last_parse_failed():
+        cache.store(source, program)
+    return program
+
+
+def prepare_program(interpreter, program, optimization_level, inline_threshold):
+    program = optimize(program, interpreter, optimization_level, inline_threshold)
+    # Błędy wykrywalne statycznie (redeklaracje, niezdefiniowane zmienne) są zgłaszane przed wykonaniem
+    return optimize_resolved(interpreter.resolve(program), optimization_level)
+
+
+# Wyjście programu jest zapisywane do końca także wtedy, gdy wykonanie przerwał błąd -
+# komunikat błędu wypisany przez wywołującego pojawia się po nim
+def run_program(interpreter, program, backend, optimization_level=0, inline_threshold=DEFAULT_INLINE_THRESHOLD,
+                max_stack_size=DEFAULT_MAX_STACK_SIZE):
+    try:
+        execute_program(interpreter, program, backend, optimization_level, inline_threshold, max_stack_size)
+    finally:
+        interpreter.output.flush()
+
+
+def execute_program(interpreter, program, backend, optimization_level, inline_threshold, max_stack_size):
+    if backend == 'stack':
+        with recursion_limit(max_stack_size):
+            program = prepare_program(interpreter, program, optimization_level, inline_threshold)
+        StackEvaluator(interpreter, max_stack_size).execute(program)
+        return
+
+    program = prepare_program(interpreter, program, optimization_level, inline_threshold)
+    if backend == 'vm':
+        from interpreter_logic.bytecode import compile_program
+        from interpreter_logic.vm import VirtualMachine
+
+        VirtualMachine(interpreter).run_program(compile_program(program))
+    elif backend == 'closure':
+        from interpreter_logic.closure_compiler import ClosureCompiler
+
+        ClosureCompiler(interpreter).execute(program)
     else:
-        debug = False
-        if len(sys.argv) == 3:
-            if sys.argv[2] != '-d':
-                print(f"Incorrect flag {sys.argv[2]}")
-                sys.exit(1)
-            else:
-                debug = True
-        filepath = sys.argv[1]
-        interpreter = Interpreter()
-
-        try:
-            with open(filepath, mode='r', encoding='utf8') as file:
-                input_file = file.read()
-            interpreter.interpret(input_file, debug)
-        except ReturnException:
-            print('Error: Return statement outside of function')
-        except Exception as e:
-            print(e)
+        interpreter.execute(program)
+
+
+if __name__ == '__main__':
+    arguments = parse_arguments()
+    flush_policy = arguments.flush
+    if flush_policy is None:
+        flush_policy = 'newline' if sys.stdout.isatty() else 'size'
+    output = BufferedOutput(None, flush_policy, arguments.output_buffer)
+    interpreter = Interpreter(arguments.memo_size, output)
+    # Komunikaty błędów (log.error) trafiają do stderr, więc przed nimi zapisujemy dotychczasowe wyjście programu
+    log.addFilter(lambda record: output.flush() or True)
+
+    try:
+        with open(arguments.path, mode='r', encoding='utf8') as file:
+            input_file = file.read()
+        ast_cache = None if arguments.no_cache else AstCache(arguments.cache_dir, arguments.cache_size)
+        parsed_program = load_program(input_file, arguments.debug, ast_cache)
+        if arguments.purity:
+            from interpreter_logic.purity import analyze_purity
+
+            for line in analyze_purity(interpreter.resolve(parsed_program)).report():
+                print(line)
+        else:
+            run_program(interpreter, parsed_program, arguments.backend, arguments.optimize, arguments.inline_size,
+                        arguments.max_stack)
+    except ReturnException:
+        print('Error: Return statement outside of function')
+    except Exception as e:
+        print(e)
+
+    if arguments.tail_calls:
+        site_counts = Counter(function_id for _, _, function_id in interpreter.tail_calls)
+        for function_name, site, function_id in interpreter.tail_calls:
+            print(f'Tail call optimized: return {function_name}(...) in function {function_name}, '
+                  f'site {site} of {site_counts[function_id]}')
+
+    if arguments.memo_stats:
+        for memo_cache in interpreter.memo_caches.values():
+            print(memo_cache)
+
+    if arguments.quickening_stats:
+        print(interpreter.quickening)
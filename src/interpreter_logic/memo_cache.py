@@ -0,0 +1,62 @@
+from collections import OrderedDict
+
+from interpreter_logic.numeric_array import LIST_TYPES
+
+DEFAULT_MEMO_CACHE_SIZE = 1024
+
+
+# Klucz wywołania: krotka argumentów wraz z ich typami, tak aby fib(1), fib(1.0) i fib(true)
+# nie dzieliły wyniku. Listy są modyfikowalne (funkcja może je zmieniać, a wywołujący może
+# zmienić je później), więc wywołania z listą w argumentach omijają cache - zwraca None
+def memo_key(arguments):
+    argument_types = tuple(map(type, arguments))
+    if not LIST_TYPES.isdisjoint(argument_types):
+        return None
+    return argument_types, tuple(arguments)
+
+
+# Cache wyników jednej funkcji oznaczonej słowem kluczowym memo. Przy przekroczeniu rozmiaru
+# usuwany jest najdawniej użyty wynik. Liczniki hits/misses/bypasses pozwalają dobrać rozmiar
+class MemoCache:
+    def __init__(self, name, max_size=DEFAULT_MEMO_CACHE_SIZE):
+        self.name = name
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.bypasses = 0
+
+    def lookup(self, key):
+        # Zwraca (True, wynik) albo (False, None), bo wynikiem funkcji może być none
+        try:
+            value = self.entries[key]
+        except KeyError:
+            self.misses += 1
+            return False, None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return True, value
+
+    def store(self, key, value):
+        # Zapamiętana lista byłaby współdzielona przez wywołujących, którzy mogą ją modyfikować
+        if self.max_size <= 0 or type(value) in LIST_TYPES:
+            return
+        self.entries[key] = value
+        if len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    def call(self, function, arguments):
+        key = memo_key(arguments)
+        if key is None:
+            self.bypasses += 1
+            return function(arguments)
+
+        found, value = self.lookup(key)
+        if not found:
+            value = function(arguments)
+            self.store(key, value)
+        return value
+
+    def __str__(self):
+        return (f'{self.name}: {self.hits} hits, {self.misses} misses, {self.bypasses} bypasses, '
+                f'{len(self.entries)}/{self.max_size} entries')
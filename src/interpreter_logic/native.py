@@ -0,0 +1,68 @@
+# Wywołania z co najwyżej tylu argumentami omijają tworzenie listy argumentów (call_direct)
+MAX_DIRECT_ARGUMENTS = 3
+
+
+# Funkcja wbudowana zaimplementowana w Pythonie. implementation przyjmuje argumenty pozycyjnie
+# i jest punktem wejścia szybkiej ścieżki wywołania; call(interpreter, arguments) to wspólny
+# protokół wszystkich wywoływalnych obiektów (Function, ClosureFunction, CompiledFunction),
+# używany przy pierwszym wywołaniu w danym miejscu i przy większej liczbie argumentów
+class NativeFunction:
+    def __init__(self, name, arity, implementation):
+        self.name = name
+        # Arity = None - funkcja przyjmuje zmienną liczbę argumentów (implementation(*values))
+        self.arity = arity
+        self.implementation = implementation
+
+    def call(self, _interpreter, arguments):
+        return self.implementation(*arguments)
+
+
+# Dekorator rejestrujący funkcję Pythona jako funkcję wbudowaną języka:
+#
+#   @native_function('len', 1)
+#   def builtin_len(values): ...
+#
+# zamienia builtin_len na obiekt NativeFunction gotowy do zdefiniowania w środowisku globalnym
+def native_function(name, arity=None):
+    def register(implementation):
+        return NativeFunction(name, arity, implementation)
+
+    return register
+
+
+# Punkt wejścia szybkiej ścieżki dla wywołania function_object z argument_count argumentami,
+# None - wywołanie przez call (funkcje języka, zbyt wiele argumentów, błędna liczba argumentów)
+def direct_implementation(function_object, argument_count):
+    if type(function_object) is NativeFunction and argument_count <= MAX_DIRECT_ARGUMENTS:
+        if function_object.arity is None or function_object.arity == argument_count:
+            return function_object.implementation
+    return None
+
+
+# Wywołanie funkcji wbudowanej z argumentami obliczanymi przez evaluate bez budowania listy.
+# Liczba argumentów jest już sprawdzona (stała dla miejsca wywołania)
+def call_direct(implementation, evaluate, arguments):
+    argument_count = len(arguments)
+    if argument_count == 1:
+        return implementation(evaluate(arguments[0]))
+    if argument_count == 2:
+        return implementation(evaluate(arguments[0]), evaluate(arguments[1]))
+    if argument_count == 0:
+        return implementation()
+    return implementation(evaluate(arguments[0]), evaluate(arguments[1]), evaluate(arguments[2]))
+
+
+# Wywołanie funkcji wbudowanej, której argumenty leżą na szczycie stosu wartości (VirtualMachine,
+# StackEvaluator), a pod nimi sama funkcja. Wynik zastępuje funkcję na stosie
+def call_from_stack(implementation, stack, argument_count):
+    if argument_count == 1:
+        stack[-1] = implementation(stack.pop())
+    elif argument_count == 2:
+        second = stack.pop()
+        stack[-1] = implementation(stack.pop(), second)
+    elif argument_count == 0:
+        stack[-1] = implementation()
+    else:
+        third = stack.pop()
+        second = stack.pop()
+        stack[-1] = implementation(stack.pop(), second, third)
@@ -0,0 +1,157 @@
+from array import array
+
+# Krótkie listy zostają listami Pythona - oszczędność pamięci jest pomijalna,
+# a zapis elementu tablicy (store_element) jest wolniejszy od zapisu do listy
+MIN_ARRAY_LENGTH = 16
+
+
+# Lista języka, której wszystkie elementy są typu int albo wszystkie typu float, przechowywana
+# w zwartej tablicy array zamiast listy obiektów. Dla programu jest zwykłą listą: ma tę samą
+# nazwę typu, wypisuje się tak samo i jest porównywana jak lista (Interpreter.are_equal).
+# Odczyt i długość są obsługiwane bezpośrednio przez array. Zapis przez przypisanie do elementu
+# listy przechodzi przez store_element (wywoływane z environment.assign_index), a nie przez
+# nadpisane __setitem__, które spowalniałoby każdy zapis kilkukrotnie
+class NumericArray(array):
+    # Lista wartości po zamianie reprezentacji (ConvertedArray)
+    __slots__ = ('values',)
+    element_type = None
+
+    def __repr__(self):
+        return repr(self.tolist())
+
+    __str__ = __repr__
+
+
+class IntArray(NumericArray):
+    __slots__ = ()
+    element_type = int
+
+
+class FloatArray(NumericArray):
+    __slots__ = ()
+    element_type = float
+
+
+# Tablica po zapisie elementu innego typu - wszystkie operacje dotyczą listy values
+class ConvertedArray(NumericArray):
+    __slots__ = ()
+
+    def __len__(self):
+        return len(self.values)
+
+    def __getitem__(self, index):
+        return self.values[index]
+
+    def __setitem__(self, index, value):
+        self.values[index] = value
+
+    def __iter__(self):
+        return iter(self.values)
+
+    def __repr__(self):
+        return repr(self.values)
+
+    __str__ = __repr__
+
+
+# Zapis elementu innego typu (albo liczby spoza zakresu 64 bitów) przenosi wartości do listy
+# Pythona w tym samym obiekcie (zmiana klasy na ConvertedArray), więc wszystkie zmienne
+# wskazujące na tę listę widzą zmianę. Indeks jest już sprawdzony przez assign_index
+def store_element(numbers, index, value):
+    if type(value) is numbers.element_type:
+        try:
+            numbers[index] = value
+            return
+        except OverflowError:
+            pass
+    if type(numbers) is ConvertedArray:
+        numbers.values[index] = value
+        return
+
+    # Zamiana następuje dopiero po udanym zapisie, więc błędny indeks nie zmienia reprezentacji
+    values = numbers.tolist()
+    values[index] = value
+    replace_with_list(numbers, values)
+
+
+def replace_with_list(numbers, values):
+    numbers.values = values
+    del numbers[:]
+    numbers.__class__ = ConvertedArray
+
+
+# Lista Pythona albo tablica array, na której można wykonywać operacje zbiorcze
+def list_storage(values):
+    if type(values) is ConvertedArray:
+        return values.values
+    return values
+
+
+# Lista Pythona z elementami tablicy; tablica na stałe przechodzi na tę listę
+def generic_storage(values):
+    if type(values) is list or type(values) is ConvertedArray:
+        return list_storage(values)
+    elements = values.tolist()
+    replace_with_list(values, elements)
+    return elements
+
+
+# Operacje zbiorcze na liście dowolnej reprezentacji. Element typu tablicy jest zapisywany
+# w tablicy, każdy inny zamienia ją na listę Pythona (ConvertedArray ma element_type = None)
+def append_element(values, value):
+    if type(values) is not list and type(value) is values.element_type:
+        try:
+            values.append(value)
+            return
+        except OverflowError:
+            pass
+    generic_storage(values).append(value)
+
+
+def fill_elements(values, value):
+    length = len(values)
+    if type(values) is not list and type(value) is values.element_type:
+        try:
+            values[:] = array(values.typecode, [value]) * length
+            return
+        except OverflowError:
+            pass
+    generic_storage(values)[:] = [value] * length
+
+
+# Lista count elementów równych value - tablica liczb dla odpowiednio długich list
+def repeat_value(value, count):
+    array_type = ARRAY_TYPES.get(type(value))
+    if array_type is None or count < MIN_ARRAY_LENGTH:
+        return [value] * count
+    array_class, typecode = array_type
+    try:
+        numbers = array_class(typecode, [value])
+    except OverflowError:
+        return [value] * count
+    # Powtórzenie w miejscu zachowuje klasę tablicy (numbers * count zwraca zwykłe array)
+    numbers *= count
+    return numbers
+
+
+# Klasa tablicy i kod typu array dla typu elementów: int - liczby 64-bitowe, float - double
+ARRAY_TYPES = {int: (IntArray, 'q'), float: (FloatArray, 'd')}
+
+# Typy wartości będących listami języka - do sprawdzeń zastępujących 'type(value) is list'
+LIST_TYPES = frozenset([list, IntArray, FloatArray, ConvertedArray])
+
+
+# Wynik obliczenia literału listy; values jest świeżo utworzoną listą wartości elementów
+def new_list(values):
+    if len(values) < MIN_ARRAY_LENGTH:
+        return values
+
+    element_type = type(values[0])
+    array_type = ARRAY_TYPES.get(element_type)
+    if array_type is None or not all(type(value) is element_type for value in values):
+        return values
+    array_class, typecode = array_type
+    try:
+        return array_class(typecode, values)
+    except OverflowError:
+        return values
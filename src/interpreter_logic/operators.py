@@ -0,0 +1,111 @@
+from interpreter_logic.interpreter import Interpreter, TYPE_NAMES
+from logging_config import log
+
+# Operatory z pełnym sprawdzaniem typów, zgodne z Interpreter.visit_binary i Interpreter.visit_unary.
+# Wykorzystywane przez alternatywne sposoby wykonania programu jako wolna ścieżka
+
+
+def unsupported_binary(operator, left_value, right_value):
+    return TypeError(f"Unsupported operator '{operator}' for types '{TYPE_NAMES[type(left_value)]}' and "
+                     f"'{TYPE_NAMES[type(right_value)]}'")
+
+
+def unsupported_unary(operator, value):
+    return TypeError(f"Unsupported operator '{operator}' for type '{TYPE_NAMES[type(value)]}'")
+
+
+def subtract(left_value, right_value):
+    if type(left_value) not in Interpreter.TYPES_SUBTRACTION or type(right_value) not in Interpreter.TYPES_SUBTRACTION:
+        raise unsupported_binary('-', left_value, right_value)
+    return left_value - right_value
+
+
+def add(left_value, right_value):
+    if type(left_value) not in Interpreter.TYPES_ADDITION or type(right_value) not in Interpreter.TYPES_ADDITION:
+        raise unsupported_binary('+', left_value, right_value)
+    return left_value + right_value
+
+
+def multiply(left_value, right_value):
+    if (type(left_value) not in Interpreter.TYPES_MULTIPLICATION
+            or type(right_value) not in Interpreter.TYPES_MULTIPLICATION):
+        raise unsupported_binary('*', left_value, right_value)
+    return left_value * right_value
+
+
+def divide(left_value, right_value):
+    if type(left_value) not in Interpreter.TYPES_DIVISION or type(right_value) not in Interpreter.TYPES_DIVISION:
+        raise unsupported_binary('/', left_value, right_value)
+    return left_value / right_value
+
+
+def check_comparison(operator, left_value, right_value):
+    if type(left_value) not in Interpreter.TYPES_COMPARISON or type(right_value) not in Interpreter.TYPES_COMPARISON:
+        raise unsupported_binary(operator, left_value, right_value)
+
+
+def greater(left_value, right_value):
+    check_comparison('>', left_value, right_value)
+    return left_value > right_value
+
+
+def greater_equal(left_value, right_value):
+    check_comparison('>=', left_value, right_value)
+    return left_value >= right_value
+
+
+def less(left_value, right_value):
+    check_comparison('<', left_value, right_value)
+    return left_value < right_value
+
+
+def less_equal(left_value, right_value):
+    check_comparison('<=', left_value, right_value)
+    return left_value <= right_value
+
+
+def negate(value):
+    if type(value) not in Interpreter.TYPES_UNARY_MINUS:
+        raise unsupported_unary('-', value)
+    return -value
+
+
+def logical_not(value):
+    if type(value) not in Interpreter.TYPES_NOT:
+        raise unsupported_unary('not', value)
+    return not bool(value)
+
+
+# Operatory 'is' oraz 'is not' wymagają Interpreter.are_equal i są obsługiwane osobno
+BINARY_OPERATORS = {
+    '-': subtract,
+    '+': add,
+    '*': multiply,
+    '/': divide,
+    '>': greater,
+    '>=': greater_equal,
+    '<': less,
+    '<=': less_equal,
+}
+
+UNARY_OPERATORS = {
+    '-': negate,
+    'not': logical_not,
+}
+
+
+# Odczyt elementu listy; load_list zwraca listę dopiero po konwersji indeksu, tak jak w Interpreter.visit_subscript
+def subscript(index, load_list):
+    try:
+        index = int(index)
+        list_values = load_list()
+        if index < 0 or index >= len(list_values):
+            log.error('Error: Index error while interpreting subscript')
+            raise IndexError(f"List index out of range")
+        return list_values[index]
+    except TypeError:
+        log.error('Error: Type error while interpreting subscript')
+        raise TypeError('Non - list objects are not subscritable')
+    except RuntimeError as e:
+        log.error(f'Error: Runtime error while interpreting subscript - {e}')
+        raise e
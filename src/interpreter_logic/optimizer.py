@@ -0,0 +1,269 @@
+from interpreter_logic import ast_expression_nodes as expr_node
+from interpreter_logic import ast_statement_nodes as stmt_node
+from interpreter_logic import operators
+
+# Poziomy optymalizacji wybierane opcją -O w main.py:
+# 0 - brak, 1 - zwijanie stałych i specjalizacja pętli licznikowych,
+# 2 - dodatkowo usuwanie martwych gałęzi if/while, wstawianie małych funkcji (inliner.py)
+#     oraz cache wyników funkcji czystych (purity.py)
+OPTIMIZATION_LEVELS = [0, 1, 2]
+
+# Maksymalna liczba węzłów ciała funkcji wstawianej w miejsce wywołania (inliner.py, -O 2)
+DEFAULT_INLINE_THRESHOLD = 40
+
+
+# Bezpośrednie węzły potomne - atrybuty będące węzłami drzewa lub listami węzłów
+def child_nodes(node):
+    children = []
+    for value in vars(node).values():
+        if type(value) is list:
+            children.extend(item for item in value if hasattr(item, 'accept'))
+        elif hasattr(value, 'accept'):
+            children.append(value)
+    return children
+
+
+# Wszystkie węzły poddrzewa w kolejności pre-order, bez rekurencji
+def walk(node):
+    nodes = [node]
+    while nodes:
+        node = nodes.pop()
+        yield node
+        nodes.extend(reversed(child_nodes(node)))
+
+
+# Zwija wyrażenia, których argumenty są literałami, do pojedynczych literałów i usuwa nawiasy (AstGrouping).
+# Wartości są liczone tymi samymi funkcjami co w czasie wykonania (operators, Interpreter.are_equal).
+# Jeżeli obliczenie zgłasza błąd, węzeł zostaje bez zmian, aby błąd wystąpił w czasie wykonania.
+# Tożsamości typu x + 0 nie są upraszczane, bo pominęłyby sprawdzenie typu x
+class ConstantFolder:
+    def __init__(self, interpreter, remove_dead_branches=False):
+        self.interpreter = interpreter
+        self.remove_dead_branches = remove_dead_branches
+
+    def fold(self, node):
+        if node is None:
+            return None
+        return node.accept(self)
+
+    def fold_all(self, nodes):
+        return [self.fold(node) for node in nodes]
+
+    def visit_program(self, program):
+        program.statements = self.fold_all(program.statements)
+        return program
+
+    def visit_statement(self, statement):
+        statement.expression = self.fold(statement.expression)
+        # Po usunięciu martwej gałęzi if zostaje sam blok, który nie wymaga opakowania
+        if isinstance(statement.expression, stmt_node.AstBlock):
+            return statement.expression
+        return statement
+
+    def visit_stmt_variable(self, statement):
+        statement.initializer = self.fold(statement.initializer)
+        return statement
+
+    def visit_block(self, block):
+        block.statements = self.fold_all(block.statements)
+        return block
+
+    def visit_if(self, if_statement):
+        if_statement.condition = self.fold(if_statement.condition)
+        if_statement.then_branch = self.fold(if_statement.then_branch)
+        if_statement.else_branch = self.fold(if_statement.else_branch)
+
+        if self.remove_dead_branches and isinstance(if_statement.condition, expr_node.AstLiteral):
+            if if_statement.condition.value:
+                return if_statement.then_branch
+            if if_statement.else_branch is not None:
+                return if_statement.else_branch
+            return stmt_node.AstBlock([])
+        return if_statement
+
+    def visit_while(self, while_statement):
+        while_statement.condition = self.fold(while_statement.condition)
+        while_statement.body = self.fold(while_statement.body)
+
+        if (self.remove_dead_branches and isinstance(while_statement.condition, expr_node.AstLiteral)
+                and not while_statement.condition.value):
+            return stmt_node.AstBlock([])
+        return while_statement
+
+    def visit_function_declaration(self, declaration):
+        declaration.body = self.fold_all(declaration.body)
+        return declaration
+
+    def visit_return(self, return_statement):
+        return_statement.value = self.fold(return_statement.value)
+        return return_statement
+
+    def visit_literal(self, expression):
+        return expression
+
+    def visit_list(self, list_expression):
+        list_expression.values = self.fold_all(list_expression.values)
+        return list_expression
+
+    def visit_grouping(self, expression):
+        return self.fold(expression.inside_expression)
+
+    def visit_unary(self, expression):
+        expression.right = self.fold(expression.right)
+        if isinstance(expression.right, expr_node.AstLiteral):
+            try:
+                return expr_node.AstLiteral(operators.UNARY_OPERATORS[expression.operator](expression.right.value))
+            except Exception:
+                pass
+        return expression
+
+    def visit_binary(self, expression):
+        expression.left = self.fold(expression.left)
+        expression.right = self.fold(expression.right)
+        literal_operands = (isinstance(expression.left, expr_node.AstLiteral)
+                            and isinstance(expression.right, expr_node.AstLiteral))
+        if not literal_operands:
+            return expression
+
+        left_value = expression.left.value
+        right_value = expression.right.value
+        try:
+            if expression.operator == 'is':
+                value = self.interpreter.are_equal(left_value, right_value)
+            elif expression.operator == 'is not':
+                value = not self.interpreter.are_equal(left_value, right_value)
+            else:
+                value = operators.BINARY_OPERATORS[expression.operator](left_value, right_value)
+        except Exception:
+            return expression
+        return expr_node.AstLiteral(value)
+
+    def visit_logic(self, expression):
+        expression.left = self.fold(expression.left)
+        expression.right = self.fold(expression.right)
+        if not isinstance(expression.left, expr_node.AstLiteral):
+            return expression
+
+        # Wynikiem jest lewy argument albo (nieobliczony jeszcze) prawy - jak w Interpreter.visit_logic
+        left_value = expression.left.value
+        if expression.operator == 'and':
+            return expression.left if not left_value else expression.right
+        return expression.left if left_value else expression.right
+
+    def visit_expr_variable(self, variable):
+        return variable
+
+    def visit_assignment(self, expression):
+        expression.value = self.fold(expression.value)
+        return expression
+
+    def visit_list_assignment(self, expression):
+        expression.value = self.fold(expression.value)
+        expression.index = self.fold(expression.index)
+        return expression
+
+    def visit_subscript(self, subscript_expression):
+        subscript_expression.index = self.fold(subscript_expression.index)
+        return subscript_expression
+
+    def visit_call(self, call_expression):
+        call_expression.arguments = self.fold_all(call_expression.arguments)
+        return call_expression
+
+
+# Zamienia pętle postaci 'while i < n do { ...; i = i + 1; }' (w tym pętle for po desugaringu)
+# na AstCountedLoop, wykonywane przez Interpreter natywną pętlą range.
+# Działa na drzewie po rozwiązaniu zmiennych: licznik musi być zmienną lokalną (ma slot),
+# a granica literałem całkowitym albo zmienną. Ciało (w całości, również w zagnieżdżonych
+# funkcjach) nie może przypisywać licznika ani granicy; granica globalna wyklucza dodatkowo
+# wywołania w ciele, bo wywołana funkcja mogłaby ją zmienić.
+# Oryginalna pętla jest zachowana w polu fallback - jest wykonywana, gdy w czasie wykonania
+# licznik albo granica nie są liczbami całkowitymi, oraz przez pozostałe backendy
+class CountedLoopSpecializer:
+    def specialize(self, node):
+        for name, value in vars(node).items():
+            if isinstance(value, list):
+                setattr(node, name, [self.specialize_node(item) for item in value])
+            else:
+                setattr(node, name, self.specialize_node(value))
+        return node
+
+    def specialize_node(self, value):
+        if not hasattr(value, 'accept'):
+            return value
+        value = self.specialize(value)
+        if isinstance(value, stmt_node.AstWhile):
+            return self.counted_loop(value) or value
+        return value
+
+    @staticmethod
+    def counted_loop(while_statement):
+        condition = while_statement.condition
+        body = while_statement.body
+        if not (isinstance(condition, expr_node.AstBinary) and condition.operator in ('<', '<=')
+                and isinstance(condition.left, expr_node.AstExprVariable) and condition.left.slot is not None):
+            return None
+        if not (isinstance(body, stmt_node.AstBlock) and body.scope is None and body.statements):
+            return None
+
+        counter = condition.left
+        bound = condition.right
+        if isinstance(bound, expr_node.AstLiteral):
+            if type(bound.value) is not int:
+                return None
+        elif not isinstance(bound, expr_node.AstExprVariable) or bound.name == counter.name:
+            return None
+
+        # Ostatnia instrukcja ciała: i = i + 1 odnoszące się do tej samej zmiennej co warunek
+        increment = body.statements[-1]
+        if isinstance(increment, stmt_node.AstStatement):
+            increment = increment.expression
+        if not (isinstance(increment, expr_node.AstAssignment) and increment.name == counter.name
+                and (increment.depth, increment.slot) == (counter.depth, counter.slot)):
+            return None
+        step = increment.value
+        if not (isinstance(step, expr_node.AstBinary) and step.operator == '+'
+                and isinstance(step.left, expr_node.AstExprVariable) and step.left.name == counter.name
+                and isinstance(step.right, expr_node.AstLiteral) and type(step.right.value) is int
+                and step.right.value == 1):
+            return None
+
+        loop_body = stmt_node.AstBlock(body.statements[:-1])
+        loop_body.scope = None
+        assigned_names = {counter.name}
+        global_bound = False
+        if isinstance(bound, expr_node.AstExprVariable):
+            assigned_names.add(bound.name)
+            global_bound = bound.slot is None
+        for node in walk(loop_body):
+            if isinstance(node, (expr_node.AstAssignment, expr_node.AstListAssignment)) and node.name in assigned_names:
+                return None
+            if global_bound and isinstance(node, expr_node.AstCall):
+                return None
+
+        loop = stmt_node.AstCountedLoop(counter.name, condition.operator, bound, loop_body, while_statement)
+        loop.depth = counter.depth
+        loop.slot = counter.slot
+        return loop
+
+
+def optimize(program, interpreter, level, inline_threshold=DEFAULT_INLINE_THRESHOLD):
+    # Wstawianie funkcji poprzedza zwijanie stałych, które uprości wstawione wyrażenia
+    if level >= 2 and inline_threshold > 0:
+        from interpreter_logic.inliner import inline_functions
+
+        program = inline_functions(program, inline_threshold)
+    if level >= 1:
+        program = ConstantFolder(interpreter, remove_dead_branches=level >= 2).fold(program)
+    return program
+
+
+# Optymalizacje wymagające informacji z resolvera (slotów zmiennych lokalnych)
+def optimize_resolved(program, level):
+    if level >= 2:
+        from interpreter_logic.purity import PureCallOptimizer, analyze_purity
+
+        program = PureCallOptimizer(program, analyze_purity(program).pure_functions()).optimize()
+    if level >= 1:
+        program = CountedLoopSpecializer().specialize(program)
+    return program
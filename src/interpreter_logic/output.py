@@ -0,0 +1,61 @@
+import sys
+
+# Kiedy bufor wyjścia programu jest zapisywany do strumienia:
+#   newline - po każdej wypisanej linii (jak print Pythona w terminalu),
+#   size - po zebraniu buffer_size znaków,
+#   exit - dopiero po zakończeniu programu (run_program, Interpreter.interpret)
+FLUSH_POLICIES = ['newline', 'size', 'exit']
+DEFAULT_BUFFER_SIZE = 64 * 1024
+
+
+# Wyjście programu (funkcja print) zbierane w buforze i zapisywane do strumienia jednym
+# wywołaniem write. stream = None oznacza sys.stdout z chwili zapisu bufora, więc działa
+# również przekierowanie contextlib.redirect_stdout
+class BufferedOutput:
+    def __init__(self, stream=None, flush_policy='newline', buffer_size=DEFAULT_BUFFER_SIZE):
+        if flush_policy not in FLUSH_POLICIES:
+            raise ValueError(f'Unknown output flush policy {flush_policy}')
+        if buffer_size < 1:
+            raise ValueError('Output buffer must hold at least one character')
+        self.stream = stream
+        self.flush_policy = flush_policy
+        # Polityka sprowadza się do progu liczby znaków w buforze, po którym następuje zapis
+        if flush_policy == 'newline':
+            self.flush_size = 1
+        elif flush_policy == 'size':
+            self.flush_size = buffer_size
+        else:
+            self.flush_size = float('inf')
+        self.parts = []
+        self.size = 0
+
+    def write(self, text):
+        self.parts.append(text)
+        self.size += len(text)
+        if self.size >= self.flush_size:
+            self.flush()
+
+    def flush(self):
+        if not self.parts:
+            return
+        text = ''.join(self.parts)
+        self.parts = []
+        self.size = 0
+        stream = sys.stdout if self.stream is None else self.stream
+        stream.write(text)
+        stream.flush()
+
+
+# Wyjście programu zapamiętywane w pamięci - do osadzania interpretera i testów
+class MemoryOutput:
+    def __init__(self):
+        self.parts = []
+
+    def write(self, text):
+        self.parts.append(text)
+
+    def flush(self):
+        pass
+
+    def getvalue(self):
+        return ''.join(self.parts)
@@ -0,0 +1,100 @@
+import hashlib
+import os
+import pickle
+
+from ply import __version__ as ply_version
+from ply import yacc
+from logging_config import log
+
+# Zmiana formatu pliku wymaga zwiększenia wersji - stare pliki zostaną wtedy pominięte
+CACHE_VERSION = 1
+TABLES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'parsetab.pickle')
+
+
+# Produkcja odtworzona z pliku - zawiera tylko pola używane przez LRParser.parse
+class CachedProduction:
+    def __init__(self, name, length, func, representation):
+        self.name = name
+        self.len = length
+        self.func = func
+        self.str = representation
+        self.callable = None
+
+    def bind(self, pdict):
+        if self.func:
+            self.callable = pdict[self.func]
+
+    def __str__(self):
+        return self.str
+
+
+# Minimalny odpowiednik yacc.LRTable wystarczający do stworzenia yacc.LRParser
+class CachedTables:
+    def __init__(self, productions, action, goto):
+        self.lr_productions = productions
+        self.lr_action = action
+        self.lr_goto = goto
+
+    def bind_callables(self, pdict):
+        for production in self.lr_productions:
+            production.bind(pdict)
+
+
+def grammar_hash(pdict):
+    reflection = yacc.ParserReflect(pdict, log=yacc.NullLogger())
+    reflection.get_all()
+    # Nazwy funkcji są częścią klucza, bo produkcje są z nimi wiązane po nazwie
+    function_names = ' '.join(function[2] for function in reflection.pfuncs)
+    key = f'{CACHE_VERSION}:{ply_version}:{reflection.signature()}:{function_names}'
+    return hashlib.sha256(key.encode('utf8')).hexdigest()
+
+
+def load_tables(path, expected_hash):
+    try:
+        with open(path, 'rb') as file:
+            data = pickle.load(file)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ValueError):
+        return None
+
+    if not isinstance(data, dict) or data.get('version') != CACHE_VERSION or data.get('hash') != expected_hash:
+        return None
+
+    productions = [CachedProduction(*production) for production in data['productions']]
+    return CachedTables(productions, data['action'], data['goto'])
+
+
+def save_tables(path, parser, tables_hash):
+    data = {
+        'version': CACHE_VERSION,
+        'hash': tables_hash,
+        'action': parser.action,
+        'goto': parser.goto,
+        'productions': [(production.name, production.len, production.func, production.str)
+                        for production in parser.productions],
+    }
+    temporary_path = f'{path}.{os.getpid()}.tmp'
+    try:
+        with open(temporary_path, 'wb') as file:
+            pickle.dump(data, file, protocol=pickle.HIGHEST_PROTOCOL)
+        # Podmiana pliku jest atomowa, więc równoległe procesy nie odczytają połowy tabel
+        os.replace(temporary_path, path)
+    except OSError as e:
+        log.debug(f'Could not write parser tables to {path} - {e}')
+        try:
+            os.remove(temporary_path)
+        except OSError:
+            pass
+
+
+def cached_yacc(module, path=TABLES_FILE):
+    pdict = vars(module)
+    tables_hash = grammar_hash(pdict)
+    tables = load_tables(path, tables_hash)
+    if tables is None:
+        # Brak aktualnych tabel - budujemy gramatykę i tablice LALR od zera
+        parser = yacc.yacc(module=module)
+        save_tables(path, parser, tables_hash)
+        return parser
+
+    tables.bind_callables(pdict)
+    return yacc.LRParser(tables, pdict.get('p_error'))
@@ -1,7 +1,11 @@
+import copy
+import sys
+import threading
+
 from interpreter_logic import ast_expression_nodes as expr_node
 from interpreter_logic import ast_statement_nodes as stmt_node
-from ply import yacc
-from interpreter_logic.tokenizer import tokens
+from interpreter_logic.parse_table_cache import cached_yacc
+from interpreter_logic.tokenizer import new_lexer, tokens
 from logging_config import log
 
 start = 'program'
@@ -64,7 +68,8 @@ def p_for_statement(p):
 
     body = p[len(p) - 1]
     if increment is not None:
-        body = stmt_node.AstBlock([body, increment])
+        # Inkrementacja jest wyrażeniem - opakowanie w AstStatement oznacza, że jej wartość jest pomijana
+        body = stmt_node.AstBlock([body, stmt_node.AstStatement(increment)])
 
     body = stmt_node.AstWhile(condition, body)
 
@@ -117,17 +122,23 @@ def p_declaration(p):
 
 
 def p_function_declaration(p):
-    '''function_declaration : FUN function'''
-    p[0] = p[2]
+    '''function_declaration : FUN function
+                            | MEMO FUN function'''
+    # 'memo fun' - wyniki funkcji są zapamiętywane dla kolejnych wywołań z tymi samymi argumentami
+    if len(p) == 4:
+        p[3].memoized = True
+        p[0] = p[3]
+    else:
+        p[0] = p[2]
 
 
 def p_function(p):
     '''function : ID '(' parameters_list ')' block
                 | ID '(' ')' block'''
     if len(p) == 6:
-        p[0] = stmt_node.AstFunctionDeclaration(p[1], p[3], p[5])
+        p[0] = stmt_node.AstFunctionDeclaration(p[1], p[3], p[5], False)
     else:
-        p[0] = stmt_node.AstFunctionDeclaration(p[1], [], p[4])
+        p[0] = stmt_node.AstFunctionDeclaration(p[1], [], p[4], False)
 
 
 def p_parameters_list(p):
@@ -335,22 +346,63 @@ def p_boolean_literal(p):
     p[0] = p[1]
 
 
+# Błąd składniowy: pomijamy tokeny do końca instrukcji (średnika) i kontynuujemy parsowanie.
+# Funkcja jest wymagana przez ply przy budowie tablic; każdy Parser podstawia własną kopię
+# związaną z jego instancją LRParser (Parser.error)
 def p_error(p):
-    if p is None:
-        print('Error: Unexpected EOF')
-    else:
-        while True:
-            token = parser.token()
-            if token is None:
-                break
-            elif token.type == ';':
-                parser.token()
-                break
-        parser.restart()
+    raise RuntimeError('Parser tables used without a Parser instance')
 
 
-parser = yacc.yacc()
+# Tablice LALR są budowane tylko przy zmianie gramatyki, w pozostałych przypadkach są wczytywane z pliku
+parser_prototype = cached_yacc(sys.modules[__name__])
+
+
+# Parser jednego wątku. Tablice i produkcje są współdzielone z prototypem (tylko do odczytu),
+# a stosy parsowania, licznik błędów i lekser (kopia tokenizer.lexer) należą do instancji,
+# więc wiele wątków może parsować jednocześnie
+class Parser:
+    def __init__(self):
+        self.lr_parser = copy.copy(parser_prototype)
+        self.lr_parser.errorfunc = self.error
+        self.syntax_errors = 0
+
+    def error(self, token):
+        self.syntax_errors += 1
+        if token is None:
+            print('Error: Unexpected EOF')
+        else:
+            while True:
+                token = self.lr_parser.token()
+                if token is None:
+                    break
+                elif token.type == ';':
+                    self.lr_parser.token()
+                    break
+            self.lr_parser.restart()
 
+    def parse(self, starting_symbol, debug):
+        self.syntax_errors = 0
+        return self.lr_parser.parse(starting_symbol, lexer=new_lexer(), debug=debug)
 
+    # Po błędzie składniowym parser kontynuuje pracę, więc zwrócone drzewo może być niekompletne
+    def last_parse_failed(self):
+        return self.syntax_errors > 0
+
+
+thread_parsers = threading.local()
+
+
+def thread_parser():
+    parser = getattr(thread_parsers, 'parser', None)
+    if parser is None:
+        parser = thread_parsers.parser = Parser()
+    return parser
+
+
+# Parsowanie parserem bieżącego wątku
 def parse(starting_symbol, debug):
-    return parser.parse(starting_symbol, debug=debug)
+    return thread_parser().parse(starting_symbol, debug)
+
+
+def last_parse_failed():
+    return thread_parser().last_parse_failed()
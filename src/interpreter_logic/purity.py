@@ -0,0 +1,134 @@
+from interpreter_logic import ast_expression_nodes as expr_node
+from interpreter_logic import ast_statement_nodes as stmt_node
+from interpreter_logic.optimizer import walk
+
+# Analiza czystości funkcji zadeklarowanych na najwyższym poziomie programu.
+# Funkcja jest czysta, gdy jej wynik zależy wyłącznie od argumentów i nie ma efektów ubocznych:
+# nie wywołuje print ani innych funkcji wbudowanych, nie zmienia list (AstListAssignment),
+# nie przypisuje i nie odczytuje zmiennych globalnych oraz wywołuje wyłącznie funkcje czyste.
+# Analiza działa na drzewie po rozwiązaniu zmiennych (slot = None oznacza zmienną globalną)
+
+
+def local_names(declaration):
+    names = set(declaration.params)
+    for node in walk_body(declaration):
+        if isinstance(node, (stmt_node.AstStmtVariable, stmt_node.AstFunctionDeclaration)):
+            names.add(node.name)
+    return names
+
+
+def walk_body(declaration):
+    for statement in declaration.body:
+        yield from walk(statement)
+
+
+class PurityAnalyzer:
+    def __init__(self, program):
+        self.program = program
+        self.declarations = {statement.name: statement for statement in program.statements
+                             if isinstance(statement, stmt_node.AstFunctionDeclaration)}
+        # Nazwa funkcji, do której gdziekolwiek przypisano inną wartość, nie wskazuje pewnie na tę funkcję
+        for node in walk(program):
+            if isinstance(node, (expr_node.AstAssignment, expr_node.AstListAssignment)) and node.slot is None:
+                self.declarations.pop(node.name, None)
+        # Nazwa funkcji -> None dla funkcji czystej albo powód, dla którego funkcja nie jest czysta
+        self.impurity = {}
+
+    def analyze(self):
+        called_functions = {}
+        for name, declaration in self.declarations.items():
+            self.impurity[name], called_functions[name] = self.local_impurity(declaration)
+
+        # Punkt stały: funkcja wywołująca funkcję nieczystą też jest nieczysta
+        changed = True
+        while changed:
+            changed = False
+            for name, callees in called_functions.items():
+                if self.impurity[name] is not None:
+                    continue
+                for callee in callees:
+                    if self.impurity[callee] is not None:
+                        self.impurity[name] = f'calls impure function {callee}'
+                        changed = True
+                        break
+        return self.impurity
+
+    def local_impurity(self, declaration):
+        names = local_names(declaration)
+        callees = set()
+        for node in walk_body(declaration):
+            if isinstance(node, expr_node.AstListAssignment):
+                return f'modifies list {node.name}', callees
+            if isinstance(node, expr_node.AstAssignment) and node.slot is None:
+                return f'assigns global variable {node.name}', callees
+            if isinstance(node, (expr_node.AstExprVariable, expr_node.AstSubscript)) and node.slot is None:
+                return f'reads global variable {node.name}', callees
+            if isinstance(node, expr_node.AstCall):
+                if node.name in names:
+                    return f'calls local function value {node.name}', callees
+                if node.name not in self.declarations:
+                    return f'calls {node.name}', callees
+                callees.add(node.name)
+        return None, callees
+
+    def pure_functions(self):
+        return {name for name, reason in self.impurity.items() if reason is None}
+
+    def report(self):
+        lines = []
+        for name, reason in self.impurity.items():
+            lines.append(f'{name}: pure' if reason is None else f'{name}: impure ({reason})')
+        return lines
+
+
+# Wykorzystanie wyników analizy (-O 2):
+# - czyste funkcje wywołujące inne funkcje dostają cache wyników jak 'memo fun'
+#   (funkcje bez wywołań są tańsze od obliczenia klucza cache),
+# - wywołania czystych funkcji z samymi literałami jako argumentami są obliczane tylko raz.
+#   Wywołanie musi wskazywać na deklarację globalną (slot = None), a nazwa nie może być
+#   zadeklarowana w żadnym zakresie lokalnym - lokalna funkcja o tej samej nazwie przesłania czystą
+class PureCallOptimizer:
+    def __init__(self, program, pure_functions):
+        self.program = program
+        self.pure_functions = pure_functions
+        self.local_names = set()
+        for node in walk(program):
+            if isinstance(node, stmt_node.AstFunctionDeclaration):
+                self.local_names.update(node.params)
+            if isinstance(node, (stmt_node.AstStmtVariable, stmt_node.AstFunctionDeclaration)) and node.slot is not None:
+                self.local_names.add(node.name)
+
+    def optimize(self):
+        for statement in self.program.statements:
+            if isinstance(statement, stmt_node.AstFunctionDeclaration) and statement.name in self.pure_functions:
+                if any(isinstance(node, expr_node.AstCall) for node in walk_body(statement)):
+                    statement.memoized = True
+        return self.hoist(self.program)
+
+    def hoist(self, node):
+        for name, value in vars(node).items():
+            if isinstance(value, list):
+                setattr(node, name, [self.hoist_node(item) for item in value])
+            else:
+                setattr(node, name, self.hoist_node(value))
+        return node
+
+    def hoist_node(self, value):
+        # Węzeł współdzielony przez kilka list mógł zostać już zastąpiony
+        if not hasattr(value, 'accept') or isinstance(value, expr_node.AstHoistedCall):
+            return value
+        value = self.hoist(value)
+        # Wywołanie ogonowe zastąpione obliczoną raz wartością nie jest już wywołaniem
+        if isinstance(value, stmt_node.AstReturn) and isinstance(value.value, expr_node.AstHoistedCall):
+            value.tail_call = False
+        if (isinstance(value, expr_node.AstCall) and value.name in self.pure_functions
+                and value.slot is None and value.name not in self.local_names
+                and all(isinstance(argument, expr_node.AstLiteral) for argument in value.arguments)):
+            return expr_node.AstHoistedCall(value)
+        return value
+
+
+def analyze_purity(program):
+    analyzer = PurityAnalyzer(program)
+    analyzer.analyze()
+    return analyzer
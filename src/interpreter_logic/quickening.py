@@ -0,0 +1,96 @@
+import operator
+
+# Specjalizacja (quickening) węzłów AstBinary i AstUnary w Interpreter.
+# Pierwsze wykonanie węzła przechodzi pełną ścieżką ze sprawdzaniem typów, po czym Interpreter
+# zapamiętuje dla węzła typy argumentów oraz funkcję wykonującą operację bezpośrednio. Kolejne wykonania
+# sprawdzają jedynie, czy typy argumentów są te same (type(x) is typ). Jeżeli nie są, węzeł
+# wraca na stałe do ścieżki ogólnej (deoptymalizacja) - miejsce z różnymi typami argumentów
+# nie byłoby szybsze po ponownej specjalizacji.
+# Tabele zawierają tylko kombinacje typów dopuszczane przez Interpreter, więc operacja
+# wyspecjalizowana daje ten sam wynik (również ten sam wyjątek, np. przy dzieleniu przez zero)
+
+NUMERIC_TYPES = (int, float, bool)
+SCALAR_TYPES = (int, float, bool, str)
+
+ARITHMETIC_OPERATIONS = {
+    '-': operator.sub,
+    '+': operator.add,
+    '*': operator.mul,
+    '/': operator.truediv,
+    '>': operator.gt,
+    '>=': operator.ge,
+    '<': operator.lt,
+    '<=': operator.le,
+}
+
+
+def always_false(left_value, right_value):
+    return False
+
+
+def always_true(left_value, right_value):
+    return True
+
+
+def binary_operations():
+    operations = {}
+    for operator_name, operation in ARITHMETIC_OPERATIONS.items():
+        for left_type in NUMERIC_TYPES:
+            for right_type in NUMERIC_TYPES:
+                operations[operator_name, left_type, right_type] = operation
+    operations['+', str, str] = operator.add
+
+    # Dla typów prostych Interpreter.are_equal sprowadza się do == (ten sam typ) albo False
+    for left_type in SCALAR_TYPES:
+        for right_type in SCALAR_TYPES:
+            if left_type is right_type:
+                operations['is', left_type, right_type] = operator.eq
+                operations['is not', left_type, right_type] = operator.ne
+            else:
+                operations['is', left_type, right_type] = always_false
+                operations['is not', left_type, right_type] = always_true
+    return operations
+
+
+# (operator, typ lewego argumentu, typ prawego argumentu) -> operacja
+BINARY_OPERATIONS = binary_operations()
+
+# (operator, typ argumentu) -> operacja
+UNARY_OPERATIONS = {('-', value_type): operator.neg for value_type in NUMERIC_TYPES}
+UNARY_OPERATIONS.update({('not', value_type): operator.not_ for value_type in NUMERIC_TYPES})
+
+
+# Specjalizacje węzłów jednego Interpretera oraz liczniki specjalizacji i deoptymalizacji
+# (wypisywane opcją --quickening-stats). Stan jest przechowywany w tabelach kluczowanych węzłem,
+# a nie w samych węzłach - drzewo programu pozostaje niezmienione, więc może być wykonywane
+# przez wiele Interpreterów (również w różnych wątkach) i zapisywane w cache (ast_cache.py).
+# Z tabel korzysta Interpreter.visit_binary i visit_unary; inne obiekty odwiedzające drzewo
+# (kompilatory, optymalizatory) ich nie widzą
+class Quickening:
+    def __init__(self):
+        # Węzeł AstBinary -> (typ lewego argumentu, typ prawego argumentu, operacja)
+        # Węzeł AstUnary -> (typ argumentu, operacja)
+        self.specialized = {}
+        self.deoptimized = set()
+        self.specializations = 0
+        self.deoptimizations = 0
+
+    def specialize_binary(self, expression, left_type, right_type):
+        operation = BINARY_OPERATIONS.get((expression.operator, left_type, right_type))
+        if operation is not None:
+            self.specialized[expression] = (left_type, right_type, operation)
+            self.specializations += 1
+
+    def specialize_unary(self, expression, value_type):
+        operation = UNARY_OPERATIONS.get((expression.operator, value_type))
+        if operation is not None:
+            self.specialized[expression] = (value_type, operation)
+            self.specializations += 1
+
+    def deoptimize(self, expression):
+        del self.specialized[expression]
+        self.deoptimized.add(expression)
+        self.deoptimizations += 1
+
+    def __str__(self):
+        return f'Quickening: {self.specializations} specializations, {self.deoptimizations} deoptimizations'
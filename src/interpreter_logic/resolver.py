@@ -0,0 +1,208 @@
+import itertools
+
+from interpreter_logic import ast_expression_nodes as expr_node
+from interpreter_logic import ast_statement_nodes as stmt_node
+
+# Statyczne rozwiązywanie zmiennych. Każde odwołanie do zmiennej lokalnej dostaje parę
+# (depth, slot) - liczbę środowisk, o które trzeba się cofnąć, oraz indeks w tablicy wartości
+# tego środowiska. Odwołania do zmiennych globalnych mają slot = None i są odczytywane po nazwie.
+# Węzły tworzące zakres (bloki, funkcje) dostają słownik scope: nazwa -> slot.
+# Bloki bez deklaracji mają scope = None i są wykonywane w środowisku otaczającym
+
+# Numery deklaracji funkcji. Instrukcja return przechowuje numer zamiast samej deklaracji,
+# bo odwołanie do węzła nadrzędnego utworzyłoby cykl w drzewie przeglądanym przez optymalizatory
+function_ids = itertools.count()
+
+
+def declares_variables(statements):
+    return any(isinstance(statement, (stmt_node.AstStmtVariable, stmt_node.AstFunctionDeclaration))
+               for statement in statements)
+
+
+# Instrukcje bloków bez deklaracji są przenoszone do listy otaczającej, dzięki czemu np. blok
+# tworzony przez parser dla pętli for (ciało + inkrementacja) nie dokłada kolejnego poziomu
+def fuse_blocks(statements):
+    fused_statements = []
+    for statement in statements:
+        if isinstance(statement, stmt_node.AstBlock) and statement.scope is None:
+            fused_statements.extend(statement.statements)
+        else:
+            fused_statements.append(statement)
+    return fused_statements
+
+
+class Resolver:
+    def __init__(self, predefined_globals=()):
+        # Stos zakresów bieżącej funkcji; pusty stos oznacza zakres globalny
+        self.scopes = []
+        self.predefined_globals = set(predefined_globals)
+        self.declared_globals = set()
+        # Zmienne globalne zadeklarowane do tej pory - do wykrywania redeklaracji
+        self.declared_in_program = set()
+        self.global_references = []
+        # Deklaracja funkcji, której ciało jest rozwiązywane, oraz znalezione wywołania ogonowe jako
+        # (nazwa funkcji, numer wywołania w ciele funkcji w kolejności w kodzie, function_id)
+        self.function = None
+        self.tail_calls = []
+
+    def resolve_program(self, program):
+        self.declared_globals = self.collect_globals(program)
+        program.accept(self)
+        # Nazwa, która nigdzie nie została zadeklarowana jako globalna, na pewno nie zostanie znaleziona
+        for name in self.global_references:
+            if name not in self.declared_globals and name not in self.predefined_globals:
+                raise RuntimeError(f'Undefined variable: {name}')
+        return program
+
+    @staticmethod
+    def collect_globals(program):
+        return {statement.name for statement in program.statements
+                if isinstance(statement, (stmt_node.AstStmtVariable, stmt_node.AstFunctionDeclaration))}
+
+    def resolve(self, node):
+        if node is not None:
+            node.accept(self)
+
+    def resolve_all(self, nodes):
+        for node in nodes:
+            node.accept(self)
+
+    def declare(self, node, name):
+        if not self.scopes:
+            if name in self.declared_in_program:
+                raise SyntaxError(f'Redeclaration of variable {name}')
+            self.declared_in_program.add(name)
+            node.slot = None
+            return
+
+        scope = self.scopes[-1]
+        if name in scope:
+            raise SyntaxError(f'Redeclaration of variable {name}')
+        node.slot = len(scope)
+        scope[name] = node.slot
+
+    def resolve_name(self, node, name):
+        for depth, scope in enumerate(reversed(self.scopes)):
+            if name in scope:
+                node.depth = depth
+                node.slot = scope[name]
+                return
+
+        node.depth = None
+        node.slot = None
+        self.global_references.append(name)
+
+    def visit_program(self, program):
+        self.resolve_all(program.statements)
+
+    def visit_statement(self, statement):
+        self.resolve(statement.expression)
+
+    def visit_stmt_variable(self, statement):
+        # Inicjalizator jest obliczany przed deklaracją, więc 'var a = a;' odwołuje się do zewnętrznego 'a'
+        self.resolve(statement.initializer)
+        self.declare(statement, statement.name)
+
+    def visit_block(self, block):
+        if not declares_variables(block.statements):
+            block.scope = None
+            self.resolve_all(block.statements)
+            block.statements = fuse_blocks(block.statements)
+            return
+
+        block.scope = {}
+        self.scopes.append(block.scope)
+        self.resolve_all(block.statements)
+        self.scopes.pop()
+        block.statements = fuse_blocks(block.statements)
+
+    def visit_if(self, if_statement):
+        self.resolve(if_statement.condition)
+        self.resolve(if_statement.then_branch)
+        self.resolve(if_statement.else_branch)
+
+    def visit_while(self, while_statement):
+        self.resolve(while_statement.condition)
+        self.resolve(while_statement.body)
+
+    def visit_function_declaration(self, declaration):
+        self.declare(declaration, declaration.name)
+
+        # Ciało funkcji widzi tylko swoje parametry, własne zmienne lokalne i zmienne globalne
+        enclosing_scopes = self.scopes
+        enclosing_function = self.function
+        declaration.scope = {}
+        self.scopes = [declaration.scope]
+        self.function = declaration
+        declaration.function_id = next(function_ids)
+        for param in declaration.params:
+            if param in declaration.scope:
+                raise SyntaxError(f'Redeclaration of variable {param}')
+            declaration.scope[param] = len(declaration.scope)
+        self.resolve_all(declaration.body)
+        declaration.body = fuse_blocks(declaration.body)
+        self.scopes = enclosing_scopes
+        self.function = enclosing_function
+
+    def visit_return(self, return_statement):
+        self.resolve(return_statement.value)
+
+        # 'return f(...)' wewnątrz f, gdzie f jest funkcją globalną - wywołanie może ponownie użyć
+        # ramki funkcji. W czasie wykonania sprawdzane jest, czy nazwa nadal wskazuje na tę funkcję
+        value = return_statement.value
+        return_statement.tail_call = (self.function is not None and isinstance(value, expr_node.AstCall)
+                                      and value.name == self.function.name and value.slot is None
+                                      and len(value.arguments) == len(self.function.params))
+        if return_statement.tail_call:
+            function_id = self.function.function_id
+            return_statement.function_id = function_id
+            site = 1 + sum(1 for call in self.tail_calls if call[2] == function_id)
+            self.tail_calls.append((self.function.name, site, function_id))
+
+    def visit_literal(self, expression):
+        pass
+
+    def visit_list(self, list_expression):
+        self.resolve_all(list_expression.values)
+
+    def visit_grouping(self, expression):
+        self.resolve(expression.inside_expression)
+
+    def visit_unary(self, expression):
+        self.resolve(expression.right)
+
+    def visit_binary(self, expression):
+        self.resolve(expression.left)
+        self.resolve(expression.right)
+
+    def visit_logic(self, expression):
+        self.resolve(expression.left)
+        self.resolve(expression.right)
+
+    def visit_expr_variable(self, variable):
+        self.resolve_name(variable, variable.name)
+
+    def visit_assignment(self, expression):
+        self.resolve(expression.value)
+        self.resolve_name(expression, expression.name)
+
+    def visit_list_assignment(self, expression):
+        self.resolve(expression.value)
+        self.resolve(expression.index)
+        self.resolve_name(expression, expression.name)
+
+    def visit_subscript(self, subscript_expression):
+        self.resolve(subscript_expression.index)
+        self.resolve_name(subscript_expression, subscript_expression.name)
+
+    def visit_call(self, call_expression):
+        self.resolve_name(call_expression, call_expression.name)
+        # Cache miejsca wywołania funkcji globalnej (Interpreter.visit_call)
+        call_expression.cached_function = None
+        call_expression.cached_implementation = None
+        call_expression.cached_version = None
+        self.resolve_all(call_expression.arguments)
+
+
+def resolve(program, predefined_globals=()):
+    return Resolver(predefined_globals).resolve_program(program)
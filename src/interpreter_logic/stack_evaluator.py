@@ -0,0 +1,459 @@
+import asyncio
+import itertools
+import sys
+import threading
+from contextlib import contextmanager
+
+from interpreter_logic import ast_expression_nodes as expr_node
+from interpreter_logic import ast_statement_nodes as stmt_node
+from interpreter_logic import operators
+from interpreter_logic.environment import Frame
+from interpreter_logic.function import Function, ReturnException
+from interpreter_logic.memo_cache import memo_key
+from interpreter_logic.native import call_from_stack, direct_implementation
+from interpreter_logic.numeric_array import LIST_TYPES, new_list
+from logging_config import log
+
+# Maksymalna liczba zadań na stosie roboczym - ogranicza głębokość wyrażeń i rekurencji
+DEFAULT_MAX_STACK_SIZE = 1_000_000
+
+# Węzły instrukcji opakowywane przez AstStatement nie zostawiają wartości na stosie wartości
+# (po usunięciu martwej gałęzi if opakowana może być również inna instrukcja AstStatement)
+STATEMENT_NODES = (stmt_node.AstStatement, stmt_node.AstStmtVariable, stmt_node.AstBlock, stmt_node.AstIf,
+                   stmt_node.AstWhile, stmt_node.AstCountedLoop, stmt_node.AstFunctionDeclaration, stmt_node.AstReturn)
+
+LEAF_NODES = {expr_node.AstLiteral, expr_node.AstExprVariable}
+
+
+# Resolver i optymalizatory przechodzą drzewo rekurencyjnie. Dla backendu stack są wykonywane
+# z limitem rekurencji podniesionym do rozmiaru stosu roboczego, aby długie wyrażenia
+# dotarły do wykonania. Limit jest wspólny dla całego procesu - przy jednoczesnym użyciu
+# w kilku wątkach poprzednia wartość jest zapamiętywana przez pierwszy z nich i przywracana
+# dopiero przez ostatni (licznik pod blokadą), aby limit nie pozostał podniesiony na stałe
+recursion_limit_lock = threading.Lock()
+recursion_limit_users = 0
+saved_recursion_limit = None
+
+
+@contextmanager
+def recursion_limit(limit):
+    global recursion_limit_users, saved_recursion_limit
+    with recursion_limit_lock:
+        if recursion_limit_users == 0:
+            saved_recursion_limit = sys.getrecursionlimit()
+        recursion_limit_users += 1
+        sys.setrecursionlimit(max(sys.getrecursionlimit(), limit))
+    try:
+        yield
+    finally:
+        with recursion_limit_lock:
+            recursion_limit_users -= 1
+            if recursion_limit_users == 0:
+                sys.setrecursionlimit(saved_recursion_limit)
+
+
+# Wykonanie programu bez rekurencji w Pythonie. Węzeł nie oblicza swoich dzieci wywołaniem
+# metody, tylko odkłada na stos roboczy zadanie dokończenia (finish_*), a nad nim zadania
+# obliczenia dzieci - w odwrotnej kolejności, aby pierwsze dziecko zostało zdjęte jako pierwsze.
+# Wartości wyrażeń trafiają na osobny stos wartości, skąd zdejmują je zadania dokończenia.
+# Wywołanie funkcji odkłada znacznik leave_function z zapisanym środowiskiem wywołującego;
+# return zdejmuje zadania aż do znacznika. Głębokość wyrażeń i rekurencji ogranicza więc
+# max_stack_size, a nie sys.getrecursionlimit(). Semantyka i komunikaty błędów są takie
+# same jak w Interpreter (operacje na wartościach są wykonywane przez jego metody)
+class StackEvaluator:
+    def __init__(self, interpreter, max_stack_size=DEFAULT_MAX_STACK_SIZE):
+        self.interpreter = interpreter
+        self.globals = interpreter.globals
+        self.environment = interpreter.globals
+        self.max_stack_size = max_stack_size
+        self.work = []
+        self.values = []
+        self.handlers = {
+            stmt_node.AstProgram: self.start_program,
+            stmt_node.AstStatement: self.start_statement,
+            stmt_node.AstStmtVariable: self.start_stmt_variable,
+            stmt_node.AstBlock: self.start_block,
+            stmt_node.AstIf: self.start_if,
+            stmt_node.AstWhile: self.start_while,
+            stmt_node.AstCountedLoop: self.start_counted_loop,
+            stmt_node.AstFunctionDeclaration: self.start_function_declaration,
+            stmt_node.AstReturn: self.start_return,
+            expr_node.AstLiteral: self.start_literal,
+            expr_node.AstList: self.start_list,
+            expr_node.AstGrouping: self.start_grouping,
+            expr_node.AstUnary: self.start_unary,
+            expr_node.AstBinary: self.start_binary,
+            expr_node.AstLogic: self.start_logic,
+            expr_node.AstExprVariable: self.start_expr_variable,
+            expr_node.AstAssignment: self.start_assignment,
+            expr_node.AstListAssignment: self.start_list_assignment,
+            expr_node.AstSubscript: self.start_subscript,
+            expr_node.AstCall: self.start_call,
+            expr_node.AstHoistedCall: self.start_hoisted_call,
+        }
+
+    def execute(self, program):
+        self.schedule(program)
+        self.run()
+
+    def run(self):
+        work = self.work
+        pop = work.pop
+        max_stack_size = self.max_stack_size
+        while work:
+            if len(work) > max_stack_size:
+                log.error('Error: Evaluation stack overflow')
+                raise RuntimeError(f'Evaluation stack exceeded {max_stack_size} entries')
+            handler, argument = pop()
+            handler(argument)
+
+    # Wykonanie we współpracy z pętlą zdarzeń: po każdych step_budget zadaniach sterowanie wraca
+    # do pętli. Anulowanie zadania asyncio przerywa program w miejscu ostatniego oddania sterowania.
+    # Zwykłe wykonanie (run) pozostaje bez licznika kroków
+    async def execute_async(self, program, step_budget):
+        if step_budget < 1:
+            raise ValueError('Step budget must be positive')
+        self.schedule(program)
+        while self.work:
+            self.run_steps(step_budget)
+            await asyncio.sleep(0)
+
+    def run_steps(self, step_count):
+        work = self.work
+        pop = work.pop
+        max_stack_size = self.max_stack_size
+        for _ in itertools.repeat(None, step_count):
+            if not work:
+                return
+            if len(work) > max_stack_size:
+                log.error('Error: Evaluation stack overflow')
+                raise RuntimeError(f'Evaluation stack exceeded {max_stack_size} entries')
+            handler, argument = pop()
+            handler(argument)
+
+    def schedule(self, node):
+        self.work.append((self.handlers[type(node)], node))
+
+    def schedule_all(self, nodes):
+        handlers = self.handlers
+        self.work.extend([(handlers[type(node)], node) for node in reversed(nodes)])
+
+    def start_program(self, program):
+        self.schedule_all(program.statements)
+
+    def start_statement(self, statement):
+        # AstStatement opakowuje zarówno wyrażenia, jak i instrukcje (if, while, return)
+        if not isinstance(statement.expression, STATEMENT_NODES):
+            self.work.append((self.discard_value, None))
+        self.schedule(statement.expression)
+
+    def discard_value(self, _):
+        self.values.pop()
+
+    def start_stmt_variable(self, statement):
+        if statement.initializer is None:
+            self.environment.define(statement.name)
+        else:
+            self.work.append((self.finish_stmt_variable, statement))
+            self.schedule(statement.initializer)
+
+    def finish_stmt_variable(self, statement):
+        self.environment.define(statement.name, self.values.pop())
+
+    def start_block(self, block):
+        # Blok bez deklaracji (scope = None) nie potrzebuje własnego środowiska
+        if block.scope is not None:
+            self.work.append((self.restore_environment, self.environment))
+            self.environment = Frame(self.environment, block.scope)
+        self.schedule_all(block.statements)
+
+    def restore_environment(self, environment):
+        self.environment = environment
+
+    def start_if(self, if_statement):
+        self.work.append((self.finish_if, if_statement))
+        self.schedule(if_statement.condition)
+
+    def finish_if(self, if_statement):
+        if self.values.pop():
+            self.schedule(if_statement.then_branch)
+        elif if_statement.else_branch is not None:
+            self.schedule(if_statement.else_branch)
+
+    def start_while(self, while_statement):
+        self.work.append((self.finish_while_condition, while_statement))
+        self.schedule(while_statement.condition)
+
+    def finish_while_condition(self, while_statement):
+        if self.values.pop():
+            # Po ciele pętli warunek jest obliczany ponownie
+            self.work.append((self.start_while, while_statement))
+            self.schedule(while_statement.body)
+
+    def start_counted_loop(self, loop):
+        self.work.append((self.finish_counted_loop_bound, loop))
+        self.schedule(loop.bound)
+
+    def finish_counted_loop_bound(self, loop):
+        bound = self.values.pop()
+        values = self.environment.ancestor(loop.depth).values
+        start = values[loop.slot]
+        if type(start) is not int or type(bound) is not int:
+            self.schedule(loop.fallback)
+            return
+
+        if loop.operator == '<=':
+            bound += 1
+        # Stan pętli: [wartości ramki, pętla, następna wartość licznika, granica, wartość końcowa]
+        self.work.append((self.counted_loop_step, [values, loop, start, bound, max(start, bound)]))
+
+    def counted_loop_step(self, state):
+        values, loop, counter, bound, final_value = state
+        if counter < bound:
+            values[loop.slot] = counter
+            state[2] = counter + 1
+            self.work.append((self.counted_loop_step, state))
+            self.schedule_all(loop.body.statements)
+        else:
+            values[loop.slot] = final_value
+
+    def start_function_declaration(self, declaration):
+        self.environment.define(declaration.name, Function(declaration))
+
+    def start_return(self, return_statement):
+        if return_statement.tail_call:
+            # Jak w Interpreter.visit_return - ciało funkcji jest wykonywane ponownie pod tym samym znacznikiem
+            call = return_statement.value
+            function_object = self.globals.get(call.name)
+            if (type(function_object) is Function
+                    and function_object.declaration.function_id == return_statement.function_id):
+                self.work.append((self.finish_tail_call, function_object))
+                self.schedule_all(call.arguments)
+                return
+
+        self.work.append((self.finish_return, return_statement))
+        if return_statement.value is None:
+            self.values.append(None)
+        else:
+            self.schedule(return_statement.value)
+
+    def finish_return(self, _):
+        value = self.values.pop()
+        work = self.work
+        while work:
+            handler, argument = work.pop()
+            if handler == self.leave_function:
+                self.return_to_caller(argument, value)
+                return
+        raise ReturnException(value)
+
+    def finish_tail_call(self, function_object):
+        arguments = self.pop_values(function_object.arity)
+        work = self.work
+        while True:
+            handler, argument = work.pop()
+            if handler == self.leave_function:
+                work.append((handler, argument))
+                break
+        self.start_function_body(function_object.declaration, arguments)
+
+    def start_literal(self, expression):
+        self.values.append(expression.value)
+
+    def start_list(self, list_expression):
+        self.work.append((self.finish_list, len(list_expression.values)))
+        self.schedule_all(list_expression.values)
+
+    def finish_list(self, length):
+        self.values.append(new_list(self.pop_values(length)))
+
+    def start_grouping(self, expression):
+        self.schedule(expression.inside_expression)
+
+    def start_unary(self, expression):
+        self.work.append((self.finish_unary, expression.operator))
+        self.schedule(expression.right)
+
+    def finish_unary(self, operator):
+        values = self.values
+        values[-1] = self.interpreter.unary_operation(operator, values[-1])
+
+    # Argumenty będące literałami lub zmiennymi są obliczane od razu, bez odkładania zadań
+    def start_binary(self, expression):
+        left = expression.left
+        right = expression.right
+        if type(right) in LEAF_NODES:
+            if type(left) in LEAF_NODES:
+                self.values.append(self.interpreter.binary_operation(
+                    expression.operator, self.leaf_value(left), self.leaf_value(right)))
+                return
+            self.work.append((self.finish_binary_leaf, expression))
+        else:
+            self.work.append((self.finish_binary, expression.operator))
+            self.schedule(right)
+        self.schedule(left)
+
+    def finish_binary_leaf(self, expression):
+        values = self.values
+        values[-1] = self.interpreter.binary_operation(expression.operator, values[-1],
+                                                       self.leaf_value(expression.right))
+
+    def leaf_value(self, node):
+        if type(node) is expr_node.AstLiteral:
+            return node.value
+        if node.slot is None:
+            return self.globals.get(node.name)
+        return self.environment.get_at(node.depth, node.slot)
+
+    def finish_binary(self, operator):
+        values = self.values
+        right_side_value = values.pop()
+        values[-1] = self.interpreter.binary_operation(operator, values[-1], right_side_value)
+
+    def start_logic(self, expression):
+        self.work.append((self.finish_logic, expression))
+        self.schedule(expression.left)
+
+    def finish_logic(self, expression):
+        # Lewy argument zostaje wynikiem, jeżeli rozstrzyga wartość wyrażenia
+        left_value = self.values[-1]
+        if expression.operator == 'and':
+            if not left_value:
+                return
+        elif expression.operator == 'or':
+            if left_value:
+                return
+        self.values.pop()
+        self.schedule(expression.right)
+
+    def start_expr_variable(self, variable):
+        if variable.slot is None:
+            self.values.append(self.globals.get(variable.name))
+        else:
+            self.values.append(self.environment.get_at(variable.depth, variable.slot))
+
+    def start_assignment(self, expression):
+        self.work.append((self.finish_assignment, expression))
+        self.schedule(expression.value)
+
+    def finish_assignment(self, expression):
+        value = self.values[-1]
+        if expression.slot is None:
+            self.globals.assign(expression.name, value)
+        else:
+            self.environment.assign_at(expression.depth, expression.slot, value)
+
+    def start_list_assignment(self, expression):
+        self.work.append((self.finish_list_assignment, expression))
+        self.schedule(expression.index)
+        self.schedule(expression.value)
+
+    def finish_list_assignment(self, expression):
+        index = self.values.pop()
+        value = self.values[-1]
+        if expression.slot is None:
+            self.globals.assign(expression.name, value, index)
+        else:
+            self.environment.assign_at(expression.depth, expression.slot, value, index)
+
+    def start_subscript(self, subscript_expression):
+        self.work.append((self.finish_subscript, subscript_expression))
+        self.schedule(subscript_expression.index)
+
+    def finish_subscript(self, subscript_expression):
+        if subscript_expression.slot is None:
+            def load_list():
+                return self.globals.get(subscript_expression.name)
+        else:
+            def load_list():
+                return self.environment.get_at(subscript_expression.depth, subscript_expression.slot)
+        self.values.append(operators.subscript(self.values.pop(), load_list))
+
+    def start_hoisted_call(self, expression):
+        try:
+            self.values.append(self.interpreter.hoisted_values[expression])
+        except KeyError:
+            self.work.append((self.finish_hoisted_call, expression))
+            self.schedule(expression.call)
+
+    def finish_hoisted_call(self, expression):
+        value = self.values[-1]
+        if type(value) not in LIST_TYPES:
+            self.interpreter.hoisted_values[expression] = value
+
+    # Funkcja jest wyszukiwana przed obliczeniem argumentów, tak jak w Interpreter.visit_call
+    def start_call(self, call_expression):
+        if call_expression.slot is None:
+            function_object = self.globals.get(call_expression.name)
+        else:
+            function_object = self.environment.get_at(call_expression.depth, call_expression.slot)
+        self.values.append(function_object)
+        self.work.append((self.finish_call, call_expression))
+        self.schedule_all(call_expression.arguments)
+
+    def finish_call(self, call_expression):
+        argument_count = len(call_expression.arguments)
+        implementation = direct_implementation(self.values[-argument_count - 1], argument_count)
+        if implementation is not None:
+            call_from_stack(implementation, self.values, argument_count)
+            return
+        arguments = self.pop_values(argument_count)
+        function_object = self.values.pop()
+        try:
+            # Arity = None - funkcja przyjmuje zmienną liczbę argumentów
+            if function_object.arity is not None and len(arguments) != function_object.arity:
+                log.error('Error: Function arity mismatch')
+                raise RuntimeError(f'Call with {len(arguments)} arguments to a function "{call_expression.name}" '
+                                   f'with arity {function_object.arity}')
+
+            if type(function_object) is Function:
+                self.enter_function(function_object.declaration, arguments)
+            else:
+                self.values.append(function_object.call(self.interpreter, arguments))
+        except NotImplementedError:
+            log.error('Error: Called object not callable')
+            raise RuntimeError('Object is not callable')
+
+    def enter_function(self, declaration, arguments):
+        # Wynik funkcji 'memo fun' jest zapisywany w cache przy powrocie (return_to_caller)
+        memo = None
+        if declaration.memoized:
+            cache = self.interpreter.memo_cache(declaration)
+            key = memo_key(arguments)
+            if key is None:
+                cache.bypasses += 1
+            else:
+                found, value = cache.lookup(key)
+                if found:
+                    self.values.append(value)
+                    return
+                memo = (cache, key)
+
+        self.work.append((self.leave_function, (self.environment, len(self.values), memo)))
+        self.start_function_body(declaration, arguments)
+
+    def start_function_body(self, declaration, arguments):
+        function_environment = Frame(self.globals, declaration.scope)
+        for param, argument in zip(declaration.params, arguments):
+            function_environment.define(param, argument)
+        self.environment = function_environment
+        self.schedule_all(declaration.body)
+
+    # Znacznik wywołania - zdjęty normalnie oznacza koniec ciała funkcji bez return
+    def leave_function(self, caller_state):
+        self.return_to_caller(caller_state, None)
+
+    def return_to_caller(self, caller_state, value):
+        environment, values_height, memo = caller_state
+        self.environment = environment
+        del self.values[values_height:]
+        if memo is not None:
+            memo[0].store(memo[1], value)
+        self.values.append(value)
+
+    def pop_values(self, count):
+        values = self.values
+        start = len(values) - count
+        popped = values[start:]
+        del values[start:]
+        return popped
@@ -0,0 +1,153 @@
+from array import array
+
+from interpreter_logic.interpreter import Interpreter, TYPE_NAMES
+from interpreter_logic.native import native_function
+from interpreter_logic.numeric_array import (LIST_TYPES, NumericArray, append_element, fill_elements, generic_storage,
+                                             list_storage, new_list, repeat_value)
+from logging_config import log
+
+# Biblioteka standardowa - natywne operacje zbiorcze na listach, rejestrowane w zmiennych
+# globalnych Interpretera (define_builtins). Program może zadeklarować własną funkcję lub zmienną
+# o nazwie funkcji wbudowanej, która ją wtedy zastępuje (Environment.define_builtin).
+# Argumenty są sprawdzane tak jak w Interpreter: listy (również tablice liczb z numeric_array.py),
+# liczby dla operacji arytmetycznych i porównań (Interpreter.TYPES_COMPARISON)
+
+
+def type_name(value):
+    if value is None:
+        return TYPE_NAMES[None]
+    return TYPE_NAMES.get(type(value), 'function')
+
+
+def argument_error(function_name, expected, value):
+    log.error(f'Error: Type error in builtin function {function_name}')
+    return TypeError(f"Function '{function_name}' expects {expected}, got '{type_name(value)}'")
+
+
+def check_list(function_name, values):
+    if type(values) not in LIST_TYPES:
+        raise argument_error(function_name, 'a list', values)
+
+
+# Tablice liczb (IntArray, FloatArray) zawierają wyłącznie liczby i nie wymagają sprawdzania
+def check_numbers(function_name, values):
+    check_list(function_name, values)
+    storage = list_storage(values)
+    if isinstance(storage, NumericArray):
+        return
+    for value in storage:
+        if type(value) not in Interpreter.TYPES_COMPARISON:
+            raise argument_error(function_name, 'a list of numbers', value)
+
+
+def check_not_empty(function_name, values):
+    if len(values) == 0:
+        log.error(f'Error: Empty list passed to builtin function {function_name}')
+        raise RuntimeError(f"Function '{function_name}' expects a non-empty list")
+
+
+@native_function('len', 1)
+def builtin_len(values):
+    if type(values) is not str:
+        check_list('len', values)
+    return len(values)
+
+
+@native_function('sum', 1)
+def builtin_sum(values):
+    check_numbers('sum', values)
+    return sum(list_storage(values))
+
+
+@native_function('min', 1)
+def builtin_min(values):
+    check_numbers('min', values)
+    check_not_empty('min', values)
+    return min(list_storage(values))
+
+
+@native_function('max', 1)
+def builtin_max(values):
+    check_numbers('max', values)
+    check_not_empty('max', values)
+    return max(list_storage(values))
+
+
+# Sortowanie i odwracanie zmieniają listę w miejscu, tak jak ich odpowiedniki pisane w języku
+@native_function('sort', 1)
+def builtin_sort(values):
+    check_numbers('sort', values)
+    storage = list_storage(values)
+    if isinstance(storage, NumericArray):
+        storage[:] = array(storage.typecode, sorted(storage))
+    else:
+        storage.sort()
+
+
+@native_function('reverse', 1)
+def builtin_reverse(values):
+    check_list('reverse', values)
+    list_storage(values).reverse()
+
+
+# Kopia płytka - elementy będące listami są wspólne dla kopii i oryginału
+def copy_list(values):
+    storage = list_storage(values)
+    if isinstance(storage, NumericArray):
+        return type(storage)(storage.typecode, storage)
+    return new_list(list(storage))
+
+
+# Wartość będąca listą jest kopiowana (copy_list) dla każdego elementu osobno, aby zmiana
+# jednego elementu nie zmieniała pozostałych
+@native_function('fill', 2)
+def builtin_fill(values, value):
+    check_list('fill', values)
+    if type(value) in LIST_TYPES:
+        generic_storage(values)[:] = [copy_list(value) for _ in range(len(values))]
+    else:
+        fill_elements(values, value)
+
+
+@native_function('copy', 1)
+def builtin_copy(values):
+    check_list('copy', values)
+    return copy_list(values)
+
+
+# Jak w fill, każdy element będący listą jest osobną kopią value
+@native_function('make_list', 2)
+def builtin_make_list(count, value):
+    if type(count) is not int:
+        raise argument_error('make_list', 'an int size', count)
+    if count < 0:
+        log.error('Error: Negative size passed to builtin function make_list')
+        raise RuntimeError(f"Function 'make_list' expects a non-negative size, got {count}")
+    if type(value) in LIST_TYPES:
+        return [copy_list(value) for _ in range(count)]
+    return repeat_value(value, count)
+
+
+@native_function('append', 2)
+def builtin_append(values, value):
+    check_list('append', values)
+    append_element(values, value)
+
+
+BUILTINS = [
+    builtin_len,
+    builtin_sum,
+    builtin_min,
+    builtin_max,
+    builtin_sort,
+    builtin_reverse,
+    builtin_fill,
+    builtin_copy,
+    builtin_make_list,
+    builtin_append,
+]
+
+
+def define_builtins(environment):
+    for function_object in BUILTINS:
+        environment.define_builtin(function_object.name, function_object)
@@ -1,8 +1,11 @@
+import re
+
 from ply import lex
 
 # Słowa kluczowe
 reserved = {
     'fun': 'FUN',
+    'memo': 'MEMO',
     'var': 'VAR',
     'for': 'FOR',
     'while': 'WHILE',
@@ -35,6 +38,10 @@ t_COMPARISON = r'>= | <= | > | <'
 t_ignore_COMMENT = r'\#(.)*'
 t_ignore_WHITESPACE = r'\s'
 
+# 'memo' jest słowem kluczowym tylko bezpośrednio przed 'fun' ('memo fun f(...)'), w pozostałych
+# miejscach jest zwykłym identyfikatorem - programy używające nazwy memo działają jak wcześniej
+memo_function = re.compile(r'\s+fun(?![a-zA-Z_0-9])')
+
 
 def t_ID(t):
     r'[a-zA-Z_][a-zA-Z_0-9]*'
@@ -45,6 +52,8 @@ def t_ID(t):
         t.value = False
     elif t.type == 'NONE':
         t.value = None
+    elif t.type == 'MEMO' and not memo_function.match(t.lexer.lexdata, t.lexer.lexpos):
+        t.type = 'ID'
     return t
 
 
@@ -70,12 +79,19 @@ def t_error(t):
     raise TypeError(f"Unknown text '{t.value}'")
 
 
+# Prototyp leksera - parsowanie i tokenize używają jego kopii, bo lekser przechowuje
+# stan (tekst wejściowy, pozycję), a kopie mogą pracować równolegle w różnych wątkach
 lexer = lex.lex()
 
 
+def new_lexer():
+    return lexer.clone()
+
+
 def tokenize(input_text):
-    lex.input(input_text)
+    token_lexer = new_lexer()
+    token_lexer.input(input_text)
     tokens_list = []
-    for token in iter(lex.token, None):
+    for token in iter(token_lexer.token, None):
         tokens_list.append(token)
     return tokens_list
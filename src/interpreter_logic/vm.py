@@ -0,0 +1,375 @@
+from interpreter_logic import operators
+from interpreter_logic.bytecode import (ADD, ADD_CONST, BUILD_LIST, CALL, DEFINE_GLOBAL, DEFINE_LOCAL, DIVIDE, GREATER,
+                                        GREATER_CONST, GREATER_EQUAL, GREATER_EQUAL_CONST, HALT, IS, IS_NOT, JUMP,
+                                        JUMP_IF_FALSE, JUMP_IF_FALSE_OR_POP, JUMP_IF_TRUE_OR_POP, LESS, LESS_CONST,
+                                        LESS_EQUAL, LESS_EQUAL_CONST, LOAD_CONST, LOAD_GLOBAL, LOAD_LOCAL,
+                                        LOCAL_ADD_CONST, LOCAL_GREATER_CONST, LOCAL_GREATER_EQUAL_CONST,
+                                        LOCAL_LESS_CONST, LOCAL_LESS_EQUAL_CONST, LOCAL_SUBTRACT_CONST, MULTIPLY,
+                                        NEGATE, NOT, POP, REDECLARATION, RETURN, STORE_GLOBAL, STORE_INDEX_GLOBAL,
+                                        STORE_INDEX_LOCAL, STORE_INDEX_LOCAL_POP, STORE_LOCAL, STORE_LOCAL_POP,
+                                        SUBSCRIPT_GLOBAL, SUBSCRIPT_LOCAL, SUBSCRIPT_LOCAL_LOCAL, SUBTRACT,
+                                        SUBTRACT_CONST, TAIL_CALL, CompiledFunction)
+from interpreter_logic.environment import assign_index
+from interpreter_logic.function import ReturnException
+from interpreter_logic.memo_cache import memo_key
+from interpreter_logic.native import call_from_stack, direct_implementation
+from interpreter_logic.numeric_array import new_list
+from logging_config import log
+
+# Maksymalna liczba aktywnych wywołań funkcji języka. Ramki są przechowywane na liście,
+# a nie na stosie Pythona, więc limit chroni jedynie przed nieskończoną rekurencją
+MAX_CALL_DEPTH = 100000
+
+
+def arity_error(argument_count, name, arity):
+    log.error('Error: Function arity mismatch')
+    return RuntimeError(f'Call with {argument_count} arguments to a function "{name}" with arity {arity}')
+
+
+def undefined_variable(name):
+    return RuntimeError(f'Undefined variable: {name}')
+
+
+# Maszyna stosowa wykonująca kod bajtowy z modułu bytecode. Zmienne globalne i funkcje wbudowane
+# są współdzielone z obiektem Interpreter, dzięki czemu semantyka obu sposobów wykonania jest taka sama
+class VirtualMachine:
+    def __init__(self, interpreter):
+        self.interpreter = interpreter
+        self.globals = interpreter.globals.variables
+
+    def run_program(self, code):
+        self.run(code.instructions, [None] * code.local_count, True)
+
+    def call_function(self, function, arguments):
+        if len(arguments) != function.arity:
+            raise arity_error(len(arguments), function.name, function.arity)
+        if function.memoized:
+            return self.interpreter.memo_cache(function.declaration).call(
+                lambda cached_arguments: self.execute_function(function, cached_arguments), arguments)
+        return self.execute_function(function, arguments)
+
+    def execute_function(self, function, arguments):
+        local_values = list(arguments) + [None] * (function.local_count - function.arity)
+        return self.run(function.instructions, local_values, False)
+
+    def run(self, instructions, local_values, top_level):
+        interpreter = self.interpreter
+        global_values = self.globals
+        stack = []
+        push = stack.append
+        pop = stack.pop
+        frames = []
+        pc = 0
+
+        while True:
+            opcode, argument = instructions[pc]
+            pc += 1
+
+            if opcode == LOAD_LOCAL:
+                push(local_values[argument])
+            elif opcode == JUMP_IF_FALSE:
+                if not pop():
+                    pc = argument
+            elif opcode == LOCAL_ADD_CONST:
+                left_value = local_values[argument[0]]
+                right_value = argument[1]
+                if type(left_value) is int and type(right_value) is int:
+                    push(left_value + right_value)
+                else:
+                    push(operators.add(left_value, right_value))
+            elif opcode == LOCAL_SUBTRACT_CONST:
+                left_value = local_values[argument[0]]
+                right_value = argument[1]
+                if type(left_value) is int and type(right_value) is int:
+                    push(left_value - right_value)
+                else:
+                    push(operators.subtract(left_value, right_value))
+            elif opcode == LOCAL_LESS_CONST:
+                left_value = local_values[argument[0]]
+                right_value = argument[1]
+                if type(left_value) is int and type(right_value) is int:
+                    push(left_value < right_value)
+                else:
+                    push(operators.less(left_value, right_value))
+            elif opcode == LOCAL_GREATER_EQUAL_CONST:
+                left_value = local_values[argument[0]]
+                right_value = argument[1]
+                if type(left_value) is int and type(right_value) is int:
+                    push(left_value >= right_value)
+                else:
+                    push(operators.greater_equal(left_value, right_value))
+            elif opcode == STORE_LOCAL_POP:
+                local_values[argument] = pop()
+            elif opcode == SUBSCRIPT_LOCAL_LOCAL:
+                list_values = local_values[argument[0]]
+                index = local_values[argument[1]]
+                if type(index) is int and type(list_values) is list and 0 <= index < len(list_values):
+                    push(list_values[index])
+                else:
+                    push(operators.subscript(index, lambda: list_values))
+            elif opcode == LOAD_CONST:
+                push(argument)
+            elif opcode == JUMP:
+                pc = argument
+            elif opcode == LOAD_GLOBAL:
+                try:
+                    push(global_values[argument])
+                except KeyError:
+                    raise undefined_variable(argument)
+            elif opcode == CALL:
+                argument_count, name = argument
+                function = stack[-argument_count - 1]
+                if type(function) is CompiledFunction:
+                    if argument_count != function.arity:
+                        raise arity_error(argument_count, name, function.arity)
+                    if len(frames) >= MAX_CALL_DEPTH:
+                        raise RecursionError('maximum recursion depth exceeded')
+                    # Wynik funkcji 'memo fun' jest zapisywany w cache przy powrocie z ramki
+                    memo = None
+                    if function.memoized:
+                        cache = interpreter.memo_cache(function.declaration)
+                        key = memo_key(stack[len(stack) - argument_count:])
+                        if key is None:
+                            cache.bypasses += 1
+                        else:
+                            found, value = cache.lookup(key)
+                            if found:
+                                del stack[-argument_count - 1:]
+                                push(value)
+                                continue
+                            memo = (cache, key)
+                    frames.append((instructions, pc, local_values, memo))
+                    if argument_count:
+                        local_values = stack[-argument_count:]
+                        del stack[-argument_count - 1:]
+                    else:
+                        local_values = []
+                        pop()
+                    if function.local_count > argument_count:
+                        local_values.extend([None] * (function.local_count - argument_count))
+                    instructions = function.instructions
+                    pc = 0
+                else:
+                    implementation = direct_implementation(function, argument_count)
+                    if implementation is not None:
+                        call_from_stack(implementation, stack, argument_count)
+                        continue
+                    arguments = stack[len(stack) - argument_count:]
+                    del stack[-argument_count - 1:]
+                    push(self.call_native(function, name, arguments))
+            elif opcode == TAIL_CALL:
+                argument_count, name = argument
+                function = stack[-argument_count - 1]
+                if type(function) is CompiledFunction and function.instructions is instructions:
+                    local_values = stack[len(stack) - argument_count:]
+                    del stack[-argument_count - 1:]
+                    if function.local_count > argument_count:
+                        local_values.extend([None] * (function.local_count - argument_count))
+                    pc = 0
+                else:
+                    # Nazwa wskazuje już na inną funkcję - zwykłe wywołanie, wynik zwróci następny RETURN
+                    arguments = stack[len(stack) - argument_count:]
+                    del stack[-argument_count - 1:]
+                    if type(function) is CompiledFunction:
+                        push(self.call_function(function, arguments))
+                    else:
+                        push(self.call_native(function, name, arguments))
+            elif opcode == RETURN:
+                if not frames:
+                    if top_level:
+                        raise ReturnException(pop())
+                    return pop()
+                instructions, pc, local_values, memo = frames.pop()
+                if memo is not None:
+                    memo[0].store(memo[1], stack[-1])
+            elif opcode == ADD:
+                right_value = pop()
+                left_value = stack[-1]
+                if type(left_value) is int and type(right_value) is int:
+                    stack[-1] = left_value + right_value
+                else:
+                    stack[-1] = operators.add(left_value, right_value)
+            elif opcode == SUBTRACT:
+                right_value = pop()
+                left_value = stack[-1]
+                if type(left_value) is int and type(right_value) is int:
+                    stack[-1] = left_value - right_value
+                else:
+                    stack[-1] = operators.subtract(left_value, right_value)
+            elif opcode == LESS:
+                right_value = pop()
+                left_value = stack[-1]
+                if type(left_value) is int and type(right_value) is int:
+                    stack[-1] = left_value < right_value
+                else:
+                    stack[-1] = operators.less(left_value, right_value)
+            elif opcode == GREATER:
+                right_value = pop()
+                left_value = stack[-1]
+                if type(left_value) is int and type(right_value) is int:
+                    stack[-1] = left_value > right_value
+                else:
+                    stack[-1] = operators.greater(left_value, right_value)
+            elif opcode == STORE_INDEX_LOCAL_POP:
+                index = pop()
+                list_values = local_values[argument]
+                if type(index) is int and type(list_values) is list and 0 <= index < len(list_values):
+                    list_values[index] = pop()
+                else:
+                    assign_index(list_values, index, pop())
+            elif opcode == LOCAL_LESS_EQUAL_CONST:
+                left_value = local_values[argument[0]]
+                right_value = argument[1]
+                if type(left_value) is int and type(right_value) is int:
+                    push(left_value <= right_value)
+                else:
+                    push(operators.less_equal(left_value, right_value))
+            elif opcode == LOCAL_GREATER_CONST:
+                left_value = local_values[argument[0]]
+                right_value = argument[1]
+                if type(left_value) is int and type(right_value) is int:
+                    push(left_value > right_value)
+                else:
+                    push(operators.greater(left_value, right_value))
+            elif opcode == POP:
+                pop()
+            elif opcode == JUMP_IF_FALSE_OR_POP:
+                if not stack[-1]:
+                    pc = argument
+                else:
+                    pop()
+            elif opcode == JUMP_IF_TRUE_OR_POP:
+                if stack[-1]:
+                    pc = argument
+                else:
+                    pop()
+            elif opcode == STORE_LOCAL:
+                local_values[argument] = stack[-1]
+            elif opcode == ADD_CONST:
+                left_value = stack[-1]
+                if type(left_value) is int and type(argument) is int:
+                    stack[-1] = left_value + argument
+                else:
+                    stack[-1] = operators.add(left_value, argument)
+            elif opcode == SUBTRACT_CONST:
+                left_value = stack[-1]
+                if type(left_value) is int and type(argument) is int:
+                    stack[-1] = left_value - argument
+                else:
+                    stack[-1] = operators.subtract(left_value, argument)
+            elif opcode == LESS_CONST:
+                left_value = stack[-1]
+                if type(left_value) is int and type(argument) is int:
+                    stack[-1] = left_value < argument
+                else:
+                    stack[-1] = operators.less(left_value, argument)
+            elif opcode == LESS_EQUAL_CONST:
+                left_value = stack[-1]
+                if type(left_value) is int and type(argument) is int:
+                    stack[-1] = left_value <= argument
+                else:
+                    stack[-1] = operators.less_equal(left_value, argument)
+            elif opcode == GREATER_CONST:
+                left_value = stack[-1]
+                if type(left_value) is int and type(argument) is int:
+                    stack[-1] = left_value > argument
+                else:
+                    stack[-1] = operators.greater(left_value, argument)
+            elif opcode == GREATER_EQUAL_CONST:
+                left_value = stack[-1]
+                if type(left_value) is int and type(argument) is int:
+                    stack[-1] = left_value >= argument
+                else:
+                    stack[-1] = operators.greater_equal(left_value, argument)
+            elif opcode == LESS_EQUAL:
+                right_value = pop()
+                left_value = stack[-1]
+                if type(left_value) is int and type(right_value) is int:
+                    stack[-1] = left_value <= right_value
+                else:
+                    stack[-1] = operators.less_equal(left_value, right_value)
+            elif opcode == GREATER_EQUAL:
+                right_value = pop()
+                left_value = stack[-1]
+                if type(left_value) is int and type(right_value) is int:
+                    stack[-1] = left_value >= right_value
+                else:
+                    stack[-1] = operators.greater_equal(left_value, right_value)
+            elif opcode == SUBSCRIPT_LOCAL:
+                index = stack[-1]
+                list_values = local_values[argument]
+                if type(index) is int and type(list_values) is list and 0 <= index < len(list_values):
+                    stack[-1] = list_values[index]
+                else:
+                    stack[-1] = operators.subscript(index, lambda: list_values)
+            elif opcode == STORE_INDEX_LOCAL:
+                index = pop()
+                list_values = local_values[argument]
+                if type(index) is int and type(list_values) is list and 0 <= index < len(list_values):
+                    list_values[index] = stack[-1]
+                else:
+                    assign_index(list_values, index, stack[-1])
+            elif opcode == DEFINE_LOCAL:
+                local_values[argument] = pop()
+            elif opcode == STORE_GLOBAL:
+                if argument not in global_values:
+                    raise undefined_variable(argument)
+                global_values[argument] = stack[-1]
+            elif opcode == SUBSCRIPT_GLOBAL:
+                index = stack[-1]
+                list_values = global_values.get(argument)
+                if type(index) is int and type(list_values) is list and 0 <= index < len(list_values):
+                    stack[-1] = list_values[index]
+                else:
+                    stack[-1] = operators.subscript(index, lambda: self.load_global(argument))
+            elif opcode == STORE_INDEX_GLOBAL:
+                index = pop()
+                assign_index(self.load_global(argument), index, stack[-1])
+            elif opcode == MULTIPLY:
+                right_value = pop()
+                stack[-1] = operators.multiply(stack[-1], right_value)
+            elif opcode == DIVIDE:
+                right_value = pop()
+                stack[-1] = operators.divide(stack[-1], right_value)
+            elif opcode == IS:
+                right_value = pop()
+                stack[-1] = interpreter.are_equal(stack[-1], right_value)
+            elif opcode == IS_NOT:
+                right_value = pop()
+                stack[-1] = not interpreter.are_equal(stack[-1], right_value)
+            elif opcode == NEGATE:
+                stack[-1] = operators.negate(stack[-1])
+            elif opcode == NOT:
+                stack[-1] = operators.logical_not(stack[-1])
+            elif opcode == BUILD_LIST:
+                if argument:
+                    list_values = stack[-argument:]
+                    del stack[-argument:]
+                else:
+                    list_values = []
+                push(new_list(list_values))
+            elif opcode == DEFINE_GLOBAL:
+                interpreter.globals.define(argument, pop())
+            elif opcode == REDECLARATION:
+                raise SyntaxError(f'Redeclaration of variable {argument}')
+            elif opcode == HALT:
+                return None
+            else:
+                raise RuntimeError(f'Unknown opcode {opcode}')
+
+    def load_global(self, name):
+        try:
+            return self.globals[name]
+        except KeyError:
+            raise undefined_variable(name)
+
+    def call_native(self, function_object, name, arguments):
+        try:
+            # Arity = None - funkcja przyjmuje zmienną liczbę argumentów
+            if function_object.arity is not None and len(arguments) != function_object.arity:
+                raise arity_error(len(arguments), name, function_object.arity)
+
+            return function_object.call(self.interpreter, arguments)
+        except NotImplementedError:
+            log.error('Error: Called object not callable')
+            raise RuntimeError('Object is not callable')
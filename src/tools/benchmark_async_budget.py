@@ -0,0 +1,61 @@
+import asyncio
+import os
+import sys
+import time
+
+SRC_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [SRC_DIRECTORY, os.path.join(SRC_DIRECTORY, 'interpreter_logic')]
+
+from interpreter_logic.interpreter import Interpreter
+from interpreter_logic.output import MemoryOutput
+
+# Długa pętla, która bez oddawania sterowania blokuje pętlę zdarzeń na cały czas wykonania
+LOOP_PROGRAM = '''
+var i = 0;
+var total = 0;
+while i < {iterations} do {{
+  total = total + i;
+  i = i + 1;
+}}
+print(total);
+'''
+
+
+# Zadanie budzone co milisekundę; najdłuższa przerwa między wybudzeniami to czas, przez który
+# program blokował pętlę zdarzeń
+async def ticker(gaps, stop):
+    last = time.perf_counter()
+    while not stop.is_set():
+        await asyncio.sleep(0.001)
+        now = time.perf_counter()
+        gaps.append(now - last)
+        last = now
+
+
+async def measure(source, step_budget):
+    gaps = []
+    stop = asyncio.Event()
+    ticker_task = asyncio.create_task(ticker(gaps, stop))
+    await asyncio.sleep(0)
+    start = time.perf_counter()
+    await Interpreter(output=MemoryOutput()).interpret_async(source, step_budget)
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await ticker_task
+    return elapsed, max(gaps)
+
+
+async def benchmark_async_budget(iterations, budgets):
+    source = LOOP_PROGRAM.format(iterations=iterations)
+    print(f'while loop, {iterations} iterations')
+    for step_budget in budgets:
+        elapsed, longest_gap = await measure(source, step_budget)
+        name = 'disabled' if step_budget is None else str(step_budget)
+        print(f'    budget {name:<10} {elapsed * 1000:10.1f} ms    longest event loop stall {longest_gap * 1000:8.1f} ms')
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        asyncio.run(benchmark_async_budget(int(sys.argv[1]), [None, 100, 1000, 10000]))
+    else:
+        asyncio.run(benchmark_async_budget(200000, [None, 100, 1000, 10000]))
@@ -0,0 +1,50 @@
+import contextlib
+import io
+import os
+import statistics
+import sys
+import time
+
+SRC_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [SRC_DIRECTORY, os.path.join(SRC_DIRECTORY, 'interpreter_logic')]
+PROGRAMS_DIRECTORY = os.path.join(os.path.dirname(SRC_DIRECTORY), 'test_programs')
+DEFAULT_PROGRAMS = ['test_fib.at', 'language_showcase.at']
+
+from interpreter_logic.interpreter import Interpreter
+from interpreter_logic.main import BACKENDS, run_program
+from interpreter_logic.parser import parse
+
+
+def measure(program, backend, repetitions):
+    times = []
+    for _ in range(repetitions):
+        interpreter = Interpreter()
+        # Wynik programu nie jest istotny - mierzymy wyłącznie czas wykonania
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            run_program(interpreter, program, backend)
+            times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def benchmark_backends(paths, repetitions):
+    for path in paths:
+        with open(path, mode='r', encoding='utf8') as file:
+            source = file.read()
+
+        print(os.path.basename(path))
+        baseline = None
+        for backend in BACKENDS:
+            # Niektóre backendy modyfikują drzewo, więc każdy dostaje własną kopię
+            elapsed = measure(parse(source, False), backend, repetitions)
+            if baseline is None:
+                baseline = elapsed
+            print(f'    {backend:<10} {elapsed * 1000:10.3f} ms    {baseline / elapsed:6.2f}x')
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        programs = sys.argv[1:]
+    else:
+        programs = [os.path.join(PROGRAMS_DIRECTORY, name) for name in DEFAULT_PROGRAMS]
+    benchmark_backends(programs, 20)
@@ -0,0 +1,58 @@
+import contextlib
+import io
+import os
+import sys
+import time
+
+SRC_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [SRC_DIRECTORY, os.path.join(SRC_DIRECTORY, 'interpreter_logic')]
+
+from interpreter_logic.interpreter import Interpreter
+from interpreter_logic.main import run_program
+from interpreter_logic.parser import parse
+
+# Programy przekraczające domyślny limit rekurencji Pythona w interpreterze drzewiastym:
+# długie wyrażenie generowane maszynowo oraz głęboka rekurencja bez wywołań ogonowych
+RECURSION_PROGRAM = '''
+fun depth(n) {{
+  if n <= 0 then return 0;
+  return 1 + depth(n - 1);
+}}
+print(depth({size}));
+'''
+
+
+def chain_program(size):
+    return 'var a = 1;\nprint(' + ' + '.join(['a'] * size) + ');\n'
+
+
+def recursion_program(size):
+    return RECURSION_PROGRAM.format(size=size)
+
+
+def measure(source, backend):
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        start = time.perf_counter()
+        try:
+            run_program(Interpreter(), parse(source, False), backend)
+        except RecursionError as e:
+            return f'failed ({e})'
+        elapsed = time.perf_counter() - start
+    return f'{elapsed * 1000:10.1f} ms    result {output.getvalue().strip()}'
+
+
+def benchmark_deep_programs(sizes):
+    for name, generate in (('expression chain', chain_program), ('recursion', recursion_program)):
+        for size in sizes:
+            source = generate(size)
+            print(f'{name}, depth {size}')
+            for backend in ('tree', 'stack'):
+                print(f'    {backend:<10} {measure(source, backend)}')
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        benchmark_deep_programs([int(size) for size in sys.argv[1:]])
+    else:
+        benchmark_deep_programs([50, 1000, 100000])
@@ -0,0 +1,61 @@
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+SRC_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+INTERPRETER_DIRECTORY = os.path.join(SRC_DIRECTORY, 'interpreter_logic')
+sys.path[:0] = [SRC_DIRECTORY, INTERPRETER_DIRECTORY]
+PROGRAMS_DIRECTORY = os.path.join(os.path.dirname(SRC_DIRECTORY), 'test_programs')
+DEFAULT_PROGRAMS = ['test_function.at', 'language_showcase.at', 'test_fib.at']
+
+from interpreter_logic.fork_server import run_remote
+
+
+def start_server(socket_path, environment):
+    server = subprocess.Popen([sys.executable, os.path.join(INTERPRETER_DIRECTORY, 'fork_server.py'), socket_path],
+                              env=environment, stderr=subprocess.DEVNULL)
+    # Serwer jest gotowy, gdy utworzy gniazdo
+    while not os.path.exists(socket_path):
+        time.sleep(0.01)
+    return server
+
+
+# Czas od uruchomienia do zakończenia programu: nowy proces main.py albo żądanie do serwera
+def measure_fresh(path, environment):
+    start = time.perf_counter()
+    subprocess.run([sys.executable, os.path.join(INTERPRETER_DIRECTORY, 'main.py'), path], env=environment,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+    return time.perf_counter() - start
+
+
+def measure_forked(path, socket_path):
+    start = time.perf_counter()
+    run_remote(socket_path, path)
+    return time.perf_counter() - start
+
+
+def benchmark_fork_server(paths, repetitions):
+    environment = dict(os.environ)
+    environment['PYTHONPATH'] = os.pathsep.join([SRC_DIRECTORY, INTERPRETER_DIRECTORY])
+    with tempfile.TemporaryDirectory() as directory:
+        socket_path = os.path.join(directory, 'server.sock')
+        server = start_server(socket_path, environment)
+        try:
+            for path in paths:
+                fresh = statistics.median(measure_fresh(path, environment) for _ in range(repetitions)) * 1000
+                forked = statistics.median(measure_forked(path, socket_path) for _ in range(repetitions)) * 1000
+                print(f'{os.path.basename(path):<24} fresh process {fresh:8.1f} ms    '
+                      f'fork server {forked:8.1f} ms    speedup {fresh / forked:5.2f}x')
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        benchmark_fork_server(sys.argv[1:], 10)
+    else:
+        benchmark_fork_server([os.path.join(PROGRAMS_DIRECTORY, name) for name in DEFAULT_PROGRAMS], 10)
@@ -0,0 +1,79 @@
+import contextlib
+import io
+import os
+import statistics
+import sys
+import time
+
+SRC_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [SRC_DIRECTORY, os.path.join(SRC_DIRECTORY, 'interpreter_logic')]
+PROGRAMS_DIRECTORY = os.path.join(os.path.dirname(SRC_DIRECTORY), 'test_programs')
+
+from interpreter_logic.function import ReturnException
+from interpreter_logic.interpreter import Interpreter
+from interpreter_logic.main import BACKENDS, run_program
+from interpreter_logic.optimizer import DEFAULT_INLINE_THRESHOLD
+from interpreter_logic.parser import parse
+
+# Program z krótkimi funkcjami pomocniczymi wywoływanymi w pętli - typowy przypadek dla inlinera
+HELPERS_PROGRAM = '''
+fun square(x) { return x * x; }
+fun clamp(x, high) {
+  if x > high then return high;
+  return x;
+}
+fun swap(l, a, b) {
+  var t = l[a];
+  l[a] = l[b];
+  l[b] = t;
+}
+
+var values = [0, 0, 0, 0, 0, 0, 0, 0, 0, 0];
+var i;
+var total = 0;
+for i = 0; i < 20000; i = i + 1 do {
+  total = total + square(i) - square(i - 1);
+  swap(values, 0, 9);
+}
+print(total);
+print(clamp(total, 100));
+'''
+
+
+def measure(source, backend, inline_threshold, repetitions):
+    times = []
+    for _ in range(repetitions):
+        # Optymalizacje modyfikują drzewo, więc każde wykonanie dostaje nowe drzewo
+        program = parse(source, False)
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            try:
+                run_program(Interpreter(), program, backend, 2, inline_threshold)
+            except ReturnException:
+                # test_return.at kończy się instrukcją return poza funkcją
+                pass
+            times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def benchmark_inlining(workloads, repetitions):
+    for name, source in workloads:
+        print(name)
+        for backend in BACKENDS:
+            without_inlining = measure(source, backend, 0, repetitions)
+            with_inlining = measure(source, backend, DEFAULT_INLINE_THRESHOLD, repetitions)
+            print(f'    {backend:<10} {without_inlining * 1000:10.3f} ms -> {with_inlining * 1000:10.3f} ms    '
+                  f'{without_inlining / with_inlining:6.2f}x')
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        paths = sys.argv[1:]
+    else:
+        paths = [os.path.join(PROGRAMS_DIRECTORY, name) for name in sorted(os.listdir(PROGRAMS_DIRECTORY))]
+
+    workloads = [('helpers (built-in workload)', HELPERS_PROGRAM)]
+    for path in paths:
+        with open(path, mode='r', encoding='utf8') as file:
+            workloads.append((os.path.basename(path), file.read()))
+    benchmark_inlining(workloads, 10)
@@ -0,0 +1,58 @@
+import os
+import sys
+import time
+import tracemalloc
+
+SRC_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [SRC_DIRECTORY, os.path.join(SRC_DIRECTORY, 'interpreter_logic')]
+
+from interpreter_logic.environment import assign_index
+from interpreter_logic.numeric_array import new_list
+
+
+# Pamięć zajmowana przez listę języka o podanych elementach: lista obiektów Pythona
+# albo tablica liczb (NumericArray) utworzona tak jak przy obliczaniu literału listy
+def measure_memory(make_elements, typed):
+    tracemalloc.start()
+    values = make_elements()
+    if typed:
+        values = new_list(values)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return values, current
+
+
+# Odczyt i zapis każdego elementu przez te same operacje co interpreter
+def measure_access(values):
+    start = time.perf_counter()
+    for index in range(len(values)):
+        values[index]
+    read_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for index in range(len(values)):
+        assign_index(values, index, values[index])
+    return read_time, time.perf_counter() - start - read_time
+
+
+def benchmark_numeric_arrays(size):
+    workloads = [
+        ('int', lambda: list(range(size))),
+        ('float', lambda: [index * 0.5 for index in range(size)]),
+    ]
+    print(f'{size} elements')
+    for name, make_elements in workloads:
+        for typed in (False, True):
+            values, memory = measure_memory(make_elements, typed)
+            read_time, write_time = measure_access(values)
+            representation = type(values).__name__
+            print(f'    {name:<6} {representation:<13} {memory / 2 ** 20:10.1f} MiB    '
+                  f'read {read_time * 1000:8.1f} ms    write {write_time * 1000:8.1f} ms')
+            del values
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        benchmark_numeric_arrays(int(sys.argv[1]))
+    else:
+        benchmark_numeric_arrays(10_000_000)
@@ -0,0 +1,51 @@
+import contextlib
+import io
+import os
+import sys
+import time
+
+SRC_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [SRC_DIRECTORY, os.path.join(SRC_DIRECTORY, 'interpreter_logic')]
+
+from interpreter_logic.interpreter import Interpreter
+from interpreter_logic.main import BACKENDS, run_program
+from interpreter_logic.parser import parse
+
+# Każde wywołanie kończy się instrukcją return, a rekurencja schodzi na głębokość depth
+RECURSION_PROGRAM = '''
+fun depth(n) {{
+  if n <= 0 then return 0;
+  return 1 + depth(n - 1);
+}}
+
+var i;
+var total = 0;
+for i = 0; i < {repetitions}; i = i + 1 do {{
+  total = total + depth({depth});
+}}
+print(total);
+'''
+
+
+def benchmark_recursion(depth, repetitions):
+    # Interpreter drzewiasty zużywa kilka ramek Pythona na każde wywołanie funkcji języka
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), depth * 20))
+    source = RECURSION_PROGRAM.format(depth=depth, repetitions=repetitions)
+    calls = (depth + 1) * repetitions
+
+    print(f'recursion depth {depth}, {repetitions} repetitions')
+    for backend in BACKENDS:
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            start = time.perf_counter()
+            run_program(Interpreter(), parse(source, False), backend)
+            elapsed = time.perf_counter() - start
+        assert output.getvalue().strip() == str(depth * repetitions)
+        print(f'    {backend:<10} {elapsed * 1000:10.1f} ms    {calls / elapsed:12.0f} calls/s')
+
+
+if __name__ == '__main__':
+    if len(sys.argv) == 3:
+        benchmark_recursion(int(sys.argv[1]), int(sys.argv[2]))
+    else:
+        benchmark_recursion(500, 100)
@@ -0,0 +1,43 @@
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+SRC_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+INTERPRETER_DIRECTORY = os.path.join(SRC_DIRECTORY, 'interpreter_logic')
+TABLES_FILE = os.path.join(INTERPRETER_DIRECTORY, 'parsetab.pickle')
+
+
+def measure_import(environment):
+    start = time.perf_counter()
+    subprocess.run([sys.executable, '-c', 'import interpreter_logic.parser'], env=environment, check=True)
+    return time.perf_counter() - start
+
+
+def benchmark_startup(repetitions):
+    environment = dict(os.environ)
+    environment['PYTHONPATH'] = os.pathsep.join([SRC_DIRECTORY, INTERPRETER_DIRECTORY])
+
+    cold_times = []
+    warm_times = []
+    for _ in range(repetitions):
+        # Zimny start - brak pliku z tablicami, gramatyka budowana od zera
+        if os.path.exists(TABLES_FILE):
+            os.remove(TABLES_FILE)
+        cold_times.append(measure_import(environment))
+        # Ciepły start - tablice wczytywane z pliku zapisanego przez poprzedni proces
+        warm_times.append(measure_import(environment))
+
+    cold = statistics.median(cold_times) * 1000
+    warm = statistics.median(warm_times) * 1000
+    print(f'cold import: {cold:.1f} ms')
+    print(f'warm import: {warm:.1f} ms')
+    print(f'speedup:     {cold / warm:.2f}x')
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        benchmark_startup(int(sys.argv[1]))
+    else:
+        benchmark_startup(10)
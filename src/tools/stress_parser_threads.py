@@ -0,0 +1,83 @@
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+SRC_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [SRC_DIRECTORY, os.path.join(SRC_DIRECTORY, 'interpreter_logic')]
+
+from interpreter_logic.interpreter import Interpreter
+from interpreter_logic.main import run_program
+from interpreter_logic.output import MemoryOutput
+from interpreter_logic.parser import Parser, last_parse_failed, parse
+
+# Każdy program wypisuje własny numer, więc pomylenie tokenów lub stosów parsowania
+# dwóch wątków zmienia wynik. Co trzeci program zawiera błąd składniowy (brak średnika),
+# po którym parser pomija resztę instrukcji i zgłasza niepowodzenie (last_parse_failed)
+PROGRAM = '''
+fun scale_{number}(x) {{
+  return x * {number} + {offset};
+}}
+var values = [{number}, {offset}, {number} + {offset}];
+var total = 0;
+for var i = 0; i < 3; i = i + 1 do {{
+  total = total + scale_{number}(values[i]);
+}}
+{broken}print(total);
+print("program {number}");
+'''
+
+
+def generate_program(number):
+    broken = 'var skipped = 1\n' if number % 3 == 0 else ''
+    return PROGRAM.format(number=number, offset=number % 7, broken=broken)
+
+
+# Wyjątek (np. z uszkodzonego stanu leksera) jest częścią wyniku i liczy się jako niezgodność
+def run_source(source, parse_source):
+    try:
+        program, failed = parse_source(source)
+        output = MemoryOutput()
+        run_program(Interpreter(output=output), program, 'tree')
+    except Exception as e:
+        return f'{type(e).__name__}: {e}', None
+    return output.getvalue(), failed
+
+
+def parse_with_thread_parser(source):
+    program = parse(source, False)
+    return program, last_parse_failed()
+
+
+def parse_with_new_parser(source):
+    parser = Parser()
+    program = parser.parse(source, False)
+    return program, parser.last_parse_failed()
+
+
+def stress_parser_threads(thread_count, program_count, rounds):
+    # Częste przełączanie wątków zwiększa szansę przeplotu w trakcie parsowania
+    sys.setswitchinterval(1e-6)
+    sources = [generate_program(number) for number in range(program_count)]
+    expected = [run_source(source, parse_with_thread_parser) for source in sources]
+
+    mismatches = 0
+    with ThreadPoolExecutor(thread_count) as executor:
+        for parse_source in (parse_with_thread_parser, parse_with_new_parser):
+            jobs = [index for _ in range(rounds) for index in range(program_count)]
+            results = executor.map(lambda index: run_source(sources[index], parse_source), jobs)
+            for index, result in zip(jobs, results):
+                if result != expected[index]:
+                    mismatches += 1
+                    print(f'{parse_source.__name__}: program {index} gave {result!r}, expected {expected[index]!r}')
+            print(f'{parse_source.__name__}: {len(jobs)} parses in {thread_count} threads')
+
+    print('OK' if mismatches == 0 else f'{mismatches} mismatches')
+    return mismatches == 0
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        succeeded = stress_parser_threads(*[int(argument) for argument in sys.argv[1:4]])
+    else:
+        succeeded = stress_parser_threads(16, 60, 20)
+    sys.exit(0 if succeeded else 1)